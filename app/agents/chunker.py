@@ -0,0 +1,148 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.agents.parser import DocumentContent
+from app.core.config import settings
+
+_PAGE_MARKER = re.compile(r"^\[Page (\d+)\]$", re.MULTILINE)
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*[.)]?|[A-Z][.)]|#{1,6})\s+\S")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class DocumentChunk:
+    index: int
+    text: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    token_estimate: int = 0
+
+
+@dataclass
+class _Unit:
+    text: str
+    page: Optional[int]
+    tokens: int
+    is_table: bool = False
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 80:
+        return False
+    if _NUMBERED_HEADING.match(stripped):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+class DocumentChunker:
+    """Split parsed documents into token-budgeted chunks on page and heading boundaries."""
+
+    def __init__(self, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.max_tokens = max_tokens if max_tokens is not None else settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = overlap_tokens if overlap_tokens is not None else settings.CHUNK_OVERLAP_TOKENS
+
+    def chunk(self, content: DocumentContent) -> List[DocumentChunk]:
+        units = self._text_units(content.text)
+        for table in content.tables or []:
+            # Tables are never split, even when a single table exceeds the budget.
+            units.append(_Unit(text=table, page=None, tokens=estimate_tokens(table), is_table=True))
+        return self._pack(units)
+
+    def _text_units(self, text: str) -> List[_Unit]:
+        units: List[_Unit] = []
+        markers = list(_PAGE_MARKER.finditer(text))
+        if not markers:
+            pages = [(None, text)]
+        else:
+            pages = []
+            for idx, marker in enumerate(markers):
+                end = markers[idx + 1].start() if idx + 1 < len(markers) else len(text)
+                pages.append((int(marker.group(1)), text[marker.end():end]))
+        for page, page_text in pages:
+            for section in self._sections(page_text):
+                units.extend(self._split_oversized(section, page))
+        return units
+
+    def _sections(self, text: str) -> List[str]:
+        sections: List[List[str]] = [[]]
+        for line in text.splitlines():
+            if _is_heading(line) and any(l.strip() for l in sections[-1]):
+                sections.append([])
+            sections[-1].append(line)
+        return [s for s in ("\n".join(lines).strip() for lines in sections) if s]
+
+    def _split_oversized(self, section: str, page: Optional[int]) -> List[_Unit]:
+        if estimate_tokens(section) <= self.max_tokens:
+            return [_Unit(text=section, page=page, tokens=estimate_tokens(section))]
+        max_chars = self.max_tokens * 4
+        pieces: List[str] = []
+        current = ""
+        for line in section.splitlines():
+            while len(line) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) > max_chars:
+                pieces.append(current)
+                current = line
+            else:
+                current = candidate
+        if current.strip():
+            pieces.append(current)
+        return [_Unit(text=p, page=page, tokens=estimate_tokens(p)) for p in pieces if p.strip()]
+
+    def _pack(self, units: List[_Unit]) -> List[DocumentChunk]:
+        chunks: List[DocumentChunk] = []
+        current: List[_Unit] = []
+        fresh = 0  # units in `current` that are not overlap carried from the previous chunk
+        for unit in units:
+            size = sum(u.tokens for u in current)
+            if fresh and size + unit.tokens > self.max_tokens:
+                chunks.append(self._build(len(chunks), current))
+                current = self._overlap(current, unit.tokens)
+                fresh = 0
+            current.append(unit)
+            fresh += 1
+        if fresh:
+            chunks.append(self._build(len(chunks), current))
+        return chunks
+
+    def _overlap(self, previous: List[_Unit], incoming: int) -> List[_Unit]:
+        """Trailing non-table units of the previous chunk that fit the overlap budget."""
+        budget = min(self.overlap_tokens, max(0, self.max_tokens - incoming))
+        carried: List[_Unit] = []
+        for unit in reversed(previous):
+            if unit.is_table or unit.tokens > budget:
+                break
+            carried.insert(0, unit)
+            budget -= unit.tokens
+        return carried
+
+    def _build(self, index: int, units: List[_Unit]) -> DocumentChunk:
+        parts: List[str] = []
+        last_page: Optional[int] = None
+        for unit in units:
+            if unit.page is not None and unit.page != last_page:
+                parts.append(f"[Page {unit.page}]\n{unit.text}")
+                last_page = unit.page
+            else:
+                parts.append(unit.text)
+        pages = [u.page for u in units if u.page is not None]
+        text = "\n\n".join(parts)
+        return DocumentChunk(
+            index=index,
+            text=text,
+            page_start=min(pages) if pages else None,
+            page_end=max(pages) if pages else None,
+            token_estimate=estimate_tokens(text),
+        )
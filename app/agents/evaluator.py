@@ -1,11 +1,17 @@
+import asyncio
 import json
 import os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Set, Tuple
 
 from pydantic_ai import Agent
 
+from app.agents.chunker import DocumentChunk
+from app.agents.llm import run_agent
+from app.agents.reducer import item_key, normalize_key
 from app.core.config import settings
 from app.core.logging import get_logger
-from app.models.models import ExtractionResult
+from app.models.models import ExtractionResult, SpaceRequirements
 from app.prompts.evaluator_prompt import PROMPT as EVALUATOR_PROMPT
 
 # Ensure the OpenAI API key is available to the client even if not exported in the shell
@@ -15,6 +21,12 @@ if settings.OPENAI_API_KEY:
 logger = get_logger(__name__)
 
 
+@dataclass
+class _Batch:
+    space_index: int
+    item_indices: List[int]
+
+
 class ConfidenceEvaluatorAgent:
     """LLM agent that re-scores extraction items for confidence."""
 
@@ -25,11 +37,13 @@ class ConfidenceEvaluatorAgent:
             system_prompt=EVALUATOR_PROMPT,
         )
 
-    async def evaluate(self, document_text: str, extraction: ExtractionResult) -> ExtractionResult:
+    async def evaluate(self, document_text: str, extraction: ExtractionResult, use_cache: bool = True) -> ExtractionResult:
         # Provide the existing extraction as JSON to reduce hallucinations.
         extraction_json = json.dumps(extraction.model_dump(), ensure_ascii=True)
         try:
-            run = await self.agent.run(
+            return await run_agent(
+                "evaluator",
+                self.agent,
                 (
                     "Document text:\n"
                     f"{document_text}\n\n"
@@ -37,9 +51,96 @@ class ConfidenceEvaluatorAgent:
                     f"{extraction_json}\n\n"
                     "Return the same structure with confidence values populated. "
                     "Do not invent new items or spaces."
-                )
+                ),
+                system_prompt=EVALUATOR_PROMPT,
+                output_type=ExtractionResult,
+                use_cache=use_cache,
             )
-            return run.output
         except Exception as exc:
             logger.exception("Confidence evaluation failed", extra={"error": str(exc)})
             raise
+
+    async def evaluate_batched(
+        self,
+        chunks: List[DocumentChunk],
+        extraction: ExtractionResult,
+        skip: Optional[Set[Tuple[int, int]]] = None,
+        use_cache: bool = True,
+    ) -> ExtractionResult:
+        """
+        Evaluate one space (or batch of EVALUATION_BATCH_SIZE items) per call, concurrently.
+
+        Each call only sees the chunks that mention the space or its items. Items listed in
+        `skip` as (space_index, item_index) keep their current confidence. A batch that still
+        fails after EVALUATION_MAX_RETRIES retries keeps its confidences and does not fail
+        the other batches.
+        """
+        result = extraction.model_copy(deep=True)
+        batches = list(self._batches(result, skip or set()))
+        if not batches:
+            return result
+        normalized_chunks = [normalize_key(chunk.text) for chunk in chunks]
+        semaphore = asyncio.Semaphore(max(1, settings.EVALUATION_CONCURRENCY))
+
+        async def evaluate_one(batch: _Batch) -> None:
+            async with semaphore:
+                await self._evaluate_batch(result, batch, chunks, normalized_chunks, use_cache)
+
+        await asyncio.gather(*(evaluate_one(batch) for batch in batches))
+        return result
+
+    def _batches(self, extraction: ExtractionResult, skip: Set[Tuple[int, int]]) -> Iterable[_Batch]:
+        size = max(1, settings.EVALUATION_BATCH_SIZE)
+        for space_index, space in enumerate(extraction.spaces):
+            pending = [i for i in range(len(space.items)) if (space_index, i) not in skip]
+            for start in range(0, len(pending), size):
+                yield _Batch(space_index=space_index, item_indices=pending[start:start + size])
+
+    def _context(self, space: SpaceRequirements, items, chunks: List[DocumentChunk], normalized_chunks: List[str]) -> str:
+        terms = {normalize_key(space.room_type)} | {item_key(i.name, i.category)[0] for i in items}
+        terms.discard("")
+        relevant = [
+            chunk.text
+            for chunk, normalized in zip(chunks, normalized_chunks)
+            if any(f" {term} " in f" {normalized} " for term in terms)
+        ]
+        return "\n\n".join(relevant or [chunk.text for chunk in chunks])
+
+    async def _evaluate_batch(
+        self,
+        result: ExtractionResult,
+        batch: _Batch,
+        chunks: List[DocumentChunk],
+        normalized_chunks: List[str],
+        use_cache: bool,
+    ) -> None:
+        space = result.spaces[batch.space_index]
+        items = [space.items[i] for i in batch.item_indices]
+        sub = ExtractionResult(
+            project_metadata=result.project_metadata,
+            spaces=[SpaceRequirements(room_type=space.room_type, dimension=space.dimension, area=space.area, items=items)],
+        )
+        context = self._context(space, items, chunks, normalized_chunks)
+        attempts = max(0, settings.EVALUATION_MAX_RETRIES) + 1
+        for attempt in range(attempts):
+            try:
+                evaluated = await self.evaluate(context, sub, use_cache=use_cache)
+                break
+            except Exception:
+                if attempt + 1 < attempts:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        else:
+            logger.warning(
+                "Confidence batch failed; keeping extractor confidences",
+                extra={"room_type": space.room_type, "items": len(items)},
+            )
+            return
+
+        scored = [item for s in evaluated.spaces for item in s.items]
+        if len(scored) == len(items):
+            for item, scored_item in zip(items, scored):
+                item.confidence = scored_item.confidence
+            return
+        by_key = {item_key(i.name, i.category): i.confidence for i in scored}
+        for item in items:
+            item.confidence = by_key.get(item_key(item.name, item.category), item.confidence)
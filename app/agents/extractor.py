@@ -1,7 +1,12 @@
+import asyncio
 import os
+from typing import List
 
 from pydantic_ai import Agent
 
+from app.agents.chunker import DocumentChunk
+from app.agents.llm import run_agent
+from app.agents.reducer import merge_extraction_results
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.models.models import ExtractionResult
@@ -22,10 +27,33 @@ class RequirementsExtractorAgent:
             system_prompt=EXTRACTOR_PROMPT,
         )
 
-    async def extract(self, text: str) -> ExtractionResult:
+    async def extract(self, text: str, use_cache: bool = True) -> ExtractionResult:
         try:
-            run = await self.agent.run(f"Extract requirements from the following text:\n\n{text}")
-            return run.output
+            return await run_agent(
+                "extractor",
+                self.agent,
+                f"Extract requirements from the following text:\n\n{text}",
+                system_prompt=EXTRACTOR_PROMPT,
+                output_type=ExtractionResult,
+                use_cache=use_cache,
+            )
         except Exception as exc:
             logger.exception("Extraction failed", extra={"error": str(exc)})
             raise
+
+    async def extract_chunks(self, chunks: List[DocumentChunk], use_cache: bool = True) -> ExtractionResult:
+        """Map: extract chunks concurrently (bounded). Reduce: merge results deterministically."""
+        if len(chunks) == 1:
+            return await self.extract(chunks[0].text, use_cache=use_cache)
+        semaphore = asyncio.Semaphore(max(1, settings.EXTRACTION_CONCURRENCY))
+
+        async def extract_one(chunk: DocumentChunk) -> ExtractionResult:
+            async with semaphore:
+                logger.info(
+                    "Extracting chunk",
+                    extra={"chunk": chunk.index, "page_start": chunk.page_start, "page_end": chunk.page_end},
+                )
+                return await self.extract(chunk.text, use_cache=use_cache)
+
+        results = await asyncio.gather(*(extract_one(chunk) for chunk in chunks))
+        return merge_extraction_results(results)
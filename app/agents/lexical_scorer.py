@@ -0,0 +1,141 @@
+import difflib
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.agents.reducer import normalize_key
+from app.core.config import settings
+from app.models.models import ExtractionResult, ItemRequirement
+
+_STOPWORDS = {
+    "and", "the", "for", "with", "or", "of", "to", "in", "on", "a", "an", "per", "each",
+    "similar", "equivalent", "preferred", "required", "approx", "approximately", "min", "max",
+}
+_NUMBER_WORDS = {
+    1: "one", 2: "two", 3: "three", 4: "four", 5: "five", 6: "six",
+    7: "seven", 8: "eight", 9: "nine", 10: "ten", 11: "eleven", 12: "twelve",
+}
+_QUANTITY_UNITS = "x|nos|no|pcs|pc|units|unit|sets|set|numbers|qty|quantity"
+_QTY_HEADERS = {"qty", "quantity", "nos", "units", "count"}
+# A number after these words is a reference ("section 2 office chair"), not a quantity
+_REFERENCE_WORDS = (
+    "page", "section", "clause", "room", "floor", "level", "zone", "phase",
+    "annexure", "appendix", "table", "figure", "item", "sr", "sl", "no",
+)
+_NOT_A_REFERENCE = "".join(f"(?<! {word})" for word in _REFERENCE_WORDS)
+# "[Page 3]" markers from the parser and "2." / "3.1)" / "-" enumerators at the start of a line
+_PAGE_MARKER = re.compile(r"^\[?page \d+\]?$", re.IGNORECASE)
+_ENUMERATOR = re.compile(r"^\s*(?:#+\s*)?(?:\d+(?:\.\d+)*[.)]|[-*\u2022])\s+")
+
+
+class LexicalConfidenceScorer:
+    """
+    Deterministic evidence scorer: checks items against the parsed text without an LLM call.
+
+    Scores follow the evaluator's rubric in spirit (name found, quantity stated, attributes
+    quoted) and are capped at 0.95; only items that clear the threshold are scored here.
+    """
+
+    def __init__(self, text: str, threshold: Optional[float] = None):
+        self.threshold = threshold if threshold is not None else settings.LEXICAL_CONFIDENCE_THRESHOLD
+        self.normalized = f" {normalize_key(text)} "
+        self.vocabulary = set(self.normalized.split())
+        self._by_initial: Dict[str, List[str]] = {}
+        for token in self.vocabulary:
+            self._by_initial.setdefault(token[0], []).append(token)
+        self._fuzzy_cache: Dict[str, bool] = {}
+        # Per-line view for quantities: (normalized line, is a table row, its quantity-column cell)
+        self._lines: List[Tuple[str, bool, Optional[str]]] = []
+        qty_column: Optional[int] = None
+        in_table = False
+        for raw in text.splitlines():
+            raw = raw.strip()
+            if not raw or _PAGE_MARKER.match(raw):
+                in_table = False
+                continue
+            is_row = raw.startswith("|")
+            qty_cell = None
+            if is_row:
+                cells = [normalize_key(c) for c in raw.strip("|").split("|")]
+                if not in_table:
+                    # Header row: remember which column holds quantities, if any
+                    qty_column = next(
+                        (i for i, c in enumerate(cells) if c.split()[:1] and c.split()[0] in _QTY_HEADERS), None
+                    )
+                elif qty_column is not None and qty_column < len(cells):
+                    qty_cell = cells[qty_column]
+            in_table = is_row
+            self._lines.append((f" {normalize_key(_ENUMERATOR.sub('', raw))} ", is_row, qty_cell))
+
+    def _token_score(self, token: str) -> float:
+        if token in self.vocabulary:
+            return 1.0
+        if len(token) < 4:
+            return 0.0
+        if token not in self._fuzzy_cache:
+            candidates = [t for t in self._by_initial.get(token[0], ()) if abs(len(t) - len(token)) <= 2]
+            self._fuzzy_cache[token] = bool(difflib.get_close_matches(token, candidates, n=1, cutoff=0.85))
+        return 0.8 if self._fuzzy_cache[token] else 0.0
+
+    def _tokens(self, value: Optional[str]) -> List[str]:
+        return [t for t in normalize_key(value).split() if t not in _STOPWORDS and (len(t) > 2 or t.isdigit())]
+
+    def _name_score(self, name: str) -> float:
+        if f" {name} " in self.normalized:
+            return 1.0
+        tokens = self._tokens(name)
+        if not tokens:
+            return 0.0
+        return sum(self._token_score(t) for t in tokens) / len(tokens)
+
+    def _quantity_score(self, quantity: Optional[int], name: str) -> float:
+        """
+        1.0 only when the quantity is stated for this item: "<qty> x <name>", "<name> ... qty <qty>",
+        "<name> x <qty>" / "<name> <qty> nos", or the Qty column of the name's table row. Page markers and
+        heading or section numbers never count, nor do numbers merely somewhere near the name.
+        """
+        if quantity is None:
+            return 0.0
+        spellings = [str(quantity)] + ([_NUMBER_WORDS[quantity]] if quantity in _NUMBER_WORDS else [])
+        qty = "(?:" + "|".join(spellings) + ")"
+        item = re.escape(name) + "(?:e?s)?"
+        patterns = re.compile(
+            rf"{_NOT_A_REFERENCE} {qty} (?:x |of )?{item} "
+            rf"| {item} (?:\w+ ){{0,5}}?(?:{_QUANTITY_UNITS}) {qty} "
+            rf"| {item} {qty} (?:{_QUANTITY_UNITS}) "
+        )
+        for line, is_row, qty_cell in self._lines:
+            if f" {name}" not in line:
+                continue
+            if is_row:
+                if qty_cell in spellings:
+                    return 1.0
+            elif patterns.search(line):
+                return 1.0
+        return 0.0
+
+    def score(self, item: ItemRequirement) -> float:
+        name = normalize_key(item.name)
+        if not name:
+            return 0.0
+        name_score = self._name_score(name)
+        quantity_score = self._quantity_score(item.quantity, name) if name_score == 1.0 else 0.0
+        attribute_tokens = []
+        for value in (item.brand_preference, item.material_preference, item.color_preference, item.technical_specs):
+            attribute_tokens.extend(self._tokens(value))
+        if attribute_tokens:
+            attribute_score = sum(self._token_score(t) for t in attribute_tokens) / len(attribute_tokens)
+            evidence = 0.5 * name_score + 0.2 * quantity_score + 0.3 * attribute_score
+        else:
+            evidence = 0.7 * name_score + 0.3 * quantity_score
+        return round(min(0.95, 0.1 + 0.85 * evidence), 3)
+
+    def prescore(self, extraction: ExtractionResult) -> Set[Tuple[int, int]]:
+        """Set confidence on items that clear the threshold; return their (space, item) indices."""
+        scored: Set[Tuple[int, int]] = set()
+        for space_index, space in enumerate(extraction.spaces):
+            for item_index, item in enumerate(space.items):
+                value = self.score(item)
+                if value >= self.threshold:
+                    item.confidence = value
+                    scored.add((space_index, item_index))
+        return scored
@@ -0,0 +1,58 @@
+import json
+import time
+from functools import lru_cache
+from typing import Any
+
+from pydantic import TypeAdapter
+from pydantic_ai import Agent
+
+from app.agents.chunker import estimate_tokens
+from app.core.config import settings
+from app.core.llm_cache import llm_cache
+from app.core.rate_limit import llm_rate_limiter
+
+
+@lru_cache(maxsize=None)
+def _adapter(output_type: Any) -> TypeAdapter:
+    return TypeAdapter(output_type)
+
+
+@lru_cache(maxsize=None)
+def _schema(output_type: Any) -> str:
+    return json.dumps(_adapter(output_type).json_schema(), sort_keys=True)
+
+
+async def run_agent(
+    agent_name: str,
+    agent: Agent,
+    prompt: str,
+    *,
+    system_prompt: str,
+    output_type: Any,
+    use_cache: bool = True,
+) -> Any:
+    """
+    Run a pydantic_ai agent through the shared LLM response cache; returns the typed output.
+
+    Cache misses go through the process-wide rate limiter, sized from an estimate of the
+    prompt plus LLM_OUTPUT_TOKEN_ESTIMATE and settled against reported usage afterwards.
+    """
+    key = llm_cache.make_key(settings.OPENAI_MODEL, system_prompt, _schema(output_type), prompt)
+    if use_cache:
+        cached = await llm_cache.get(agent_name, key)
+        if cached is not None:
+            return _adapter(output_type).validate_json(cached)
+    else:
+        llm_cache.record_bypass(agent_name)
+
+    estimated = estimate_tokens(system_prompt) + estimate_tokens(prompt) + settings.LLM_OUTPUT_TOKEN_ESTIMATE
+    async with llm_rate_limiter.slot(estimated):
+        started = time.perf_counter()
+        run = await agent.run(prompt)
+        elapsed = time.perf_counter() - started
+    usage = run.usage() if callable(run.usage) else run.usage  # method in older pydantic_ai releases
+    actual = getattr(usage, "total_tokens", None)
+    if actual:
+        llm_rate_limiter.settle(estimated, actual)
+    await llm_cache.set(agent_name, key, _adapter(output_type).dump_json(run.output), elapsed)
+    return run.output
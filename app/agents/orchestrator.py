@@ -1,9 +1,17 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 
+from app.agents.chunker import DocumentChunker
 from app.agents.parser import DocumentParserAgent
 from app.agents.extractor import RequirementsExtractorAgent
 from app.agents.evaluator import ConfidenceEvaluatorAgent
+from app.agents.lexical_scorer import LexicalConfidenceScorer
+from app.agents.reducer import item_key, normalize_key
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.entities.entities import Project, Space, Item
 
@@ -13,20 +21,33 @@ class OrchestratorAgent:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.parser = DocumentParserAgent()
+        self.chunker = DocumentChunker()
         self.extractor = RequirementsExtractorAgent()
         self.evaluator = ConfidenceEvaluatorAgent()
 
-    async def create_or_update_project_from_document(self, document) -> int:
-        """Analyze document, then create or update linked project with spaces/items."""
-        from app.entities.entities import Project, Space, Item
+    async def create_or_update_project_from_document(
+        self,
+        document,
+        use_cache: bool = True,
+        on_stage: Optional[Callable[[str], None]] = None,
+    ) -> int:
+        """Analyze document, then create or update linked project with spaces/items.
+
+        use_cache=False bypasses the LLM response cache for this run (results still refresh it).
+        on_stage is called with "parsed", "extracted", "evaluated" and "persisted" as each step completes.
+        """
+        report = on_stage or (lambda stage: None)
 
         # 1) Parse document (async wrapper to avoid blocking)
         try:
-            content = await self.parser.parse_file_async(document.file_path)
+            content = await self.parser.parse_file_async(
+                document.file_path, getattr(document, "content_sha256", None)
+            )
             logger.info(
                 "Document parsed",
                 extra={"document_id": getattr(document, "id", None)},
             )
+            report("parsed")
         except Exception as exc:
             logger.exception(
                 "Failed to parse document",
@@ -34,14 +55,41 @@ class OrchestratorAgent:
             )
             raise
 
-        # 2) Extract structured requirements
+        # 2) Chunk on page/heading boundaries, then extract structured requirements
+        chunks = self.chunker.chunk(content)
+        logger.info(
+            "Document chunked",
+            extra={"document_id": getattr(document, "id", None), "chunks": len(chunks)},
+        )
+        if not chunks:
+            raise ValueError("Document has no extractable text")
+
         try:
-            extraction_result = await self.extractor.extract(content.text)
-            extraction_result = await self.evaluator.evaluate(content.text, extraction_result)
+            extraction_result = await self.extractor.extract_chunks(chunks, use_cache=use_cache)
+            report("extracted")
+            if settings.EVALUATION_BATCHED:
+                prescored = set()
+                if settings.LEXICAL_PRESCORE_ENABLED:
+                    scorer = LexicalConfidenceScorer("\n\n".join(chunk.text for chunk in chunks))
+                    prescored = scorer.prescore(extraction_result)
+                    logger.info(
+                        "Items pre-scored lexically",
+                        extra={
+                            "document_id": getattr(document, "id", None),
+                            "prescored": len(prescored),
+                            "total": sum(len(s.items) for s in extraction_result.spaces),
+                        },
+                    )
+                extraction_result = await self.evaluator.evaluate_batched(
+                    chunks, extraction_result, skip=prescored, use_cache=use_cache
+                )
+            else:
+                extraction_result = await self.evaluator.evaluate(content.text, extraction_result, use_cache=use_cache)
             logger.info(
                 "Extraction and evaluation completed",
                 extra={"document_id": getattr(document, "id", None)},
             )
+            report("evaluated")
         except Exception as exc:
             logger.exception(
                 "Failed to extract or evaluate requirements",
@@ -49,68 +97,215 @@ class OrchestratorAgent:
             )
             raise
 
-        # 3) Upsert project (reuse existing if document already linked)
+        # 3) Persist project, spaces and items in a single transaction
+        try:
+            project_id = await self._persist(document, extraction_result)
+        except Exception as exc:
+            await self.session.rollback()
+            logger.exception(
+                "Failed to persist analysis",
+                extra={"document_id": getattr(document, "id", None), "error": str(exc)},
+            )
+            raise
+        report("persisted")
+        return project_id
+
+    async def _persist(self, document, extraction_result) -> int:
+        """Upsert the project and write its spaces/items with set-based statements; commits once."""
         metadata = extraction_result.project_metadata
         project = None
         if document.project_id:
             project = await self.session.get(Project, document.project_id)
         if project is None:
-            project = Project(
-                name=metadata.name or document.filename,
-                client_type=metadata.client_type,
-                location=metadata.location,
-                timeline=metadata.timeline,
-                budget_range=metadata.budget_range,
-            )
+            project = Project()
             self.session.add(project)
-            await self.session.commit()
-            await self.session.refresh(project)
+        fields = {
+            "name": metadata.name or document.filename,
+            "client_type": metadata.client_type,
+            "location": metadata.location,
+            "timeline": metadata.timeline,
+            "budget_range": metadata.budget_range,
+        }
+        existing = project.id is not None
+        metadata_changed = existing and any(getattr(project, k) != v for k, v in fields.items())
+        for name, value in fields.items():
+            setattr(project, name, value)
+        await self.session.flush()
+
+        if settings.ANALYSIS_PERSIST_MODE == "replace":
+            stats = await self._replace_children(project.id, extraction_result.spaces)
         else:
-            project.name = metadata.name or document.filename
-            project.client_type = metadata.client_type
-            project.location = metadata.location
-            project.timeline = metadata.timeline
-            project.budget_range = metadata.budget_range
-            await self.session.commit()
-
-        # 4) Replace spaces/items for this project
-        existing_spaces = await self.session.execute(select(Space).where(Space.project_id == project.id))
-        for space in existing_spaces.scalars().all():
-            await self.session.delete(space)
+            stats = await self._reconcile_children(project.id, extraction_result.spaces)
+        if metadata_changed or (existing and any(stats.values())):
+            # projects.version keys cached analysis reads
+            project.version = (project.version or 1) + 1
+
+        document.project_id = project.id
         await self.session.commit()
+        logger.info(
+            "Analysis persisted",
+            extra={"project_id": project.id, "mode": settings.ANALYSIS_PERSIST_MODE, **stats},
+        )
+        return project.id
 
-        for space_data in extraction_result.spaces:
-            space = Space(
-                project_id=project.id,
-                room_type=space_data.room_type,
-                dimension=space_data.dimension,
-                area=space_data.area,
-            )
-            self.session.add(space)
-            await self.session.commit()
-            await self.session.refresh(space)
+    async def _replace_children(self, project_id: int, spaces) -> dict:
+        """Delete every space/item of the project and insert the extraction afresh."""
+        # Items first: the space -> item cascade is ORM-only, not enforced by the FK
+        old_space_ids = select(Space.id).where(Space.project_id == project_id)
+        items_deleted = await self.session.execute(
+            delete(Item).where(Item.space_id.in_(old_space_ids)),
+            execution_options={"synchronize_session": False},
+        )
+        spaces_deleted = await self.session.execute(
+            delete(Space).where(Space.project_id == project_id),
+            execution_options={"synchronize_session": False},
+        )
+        space_ids = await self._insert_spaces(project_id, spaces)
+        item_rows = [
+            self._item_row(space_id, item_data)
+            for space_id, space_data in zip(space_ids, spaces)
+            for item_data in space_data.items
+        ]
+        if item_rows:
+            await self.session.execute(insert(Item), item_rows)
+        return {
+            "spaces_deleted": spaces_deleted.rowcount,
+            "items_deleted": items_deleted.rowcount,
+            "spaces_inserted": len(space_ids),
+            "items_inserted": len(item_rows),
+        }
+
+    async def _reconcile_children(self, project_id: int, spaces) -> dict:
+        """
+        Diff the extraction against stored spaces/items and write only what changed.
+
+        Spaces match on normalized room_type, items on (normalized name, category) within
+        their space. Matched rows keep their id and is_accepted; changed ones get version + 1.
 
+        Human-owned items (reviewed, i.e. is_accepted set, or added by hand) and manual spaces
+        are never updated or deleted; they still absorb a match so the extraction does not
+        duplicate them.
+        Unmatched extracted items and spaces are deleted, except manual spaces and spaces
+        that still hold human-owned items.
+        """
+        now = datetime.utcnow()
+        stats = dict.fromkeys(
+            ("spaces_inserted", "spaces_updated", "spaces_deleted", "items_inserted", "items_updated", "items_deleted"),
+            0,
+        )
+
+        existing_spaces: Dict[str, List] = defaultdict(list)
+        for row in await self.session.execute(
+            select(*_SPACE_COLUMNS).where(Space.project_id == project_id).order_by(Space.id)
+        ):
+            existing_spaces[normalize_key(row.room_type)].append(row)
+        existing_items: Dict[int, Dict[tuple, List]] = defaultdict(lambda: defaultdict(list))
+        space_ids = [row.id for rows in existing_spaces.values() for row in rows]
+        if space_ids:
+            for row in await self.session.execute(
+                select(*_ITEM_COLUMNS).where(Item.space_id.in_(space_ids)).order_by(Item.id)
+            ):
+                existing_items[row.space_id][item_key(row.name, row.category)].append(row)
+
+        space_updates, item_updates, item_inserts, new_spaces = [], [], [], []
+        stale_item_ids: List[int] = []
+        for space_data in spaces:
+            candidates = existing_spaces.get(normalize_key(space_data.room_type))
+            if not candidates:
+                new_spaces.append(space_data)
+                continue
+            current = candidates.pop(0)
+            values = {"room_type": space_data.room_type, "dimension": space_data.dimension, "area": space_data.area}
+            # Manual spaces still take part in item matching but keep their own fields
+            if current.source != "manual" and _changed(current, values):
+                space_updates.append({"id": current.id, **values, "version": current.version + 1, "updated_at": now})
+
+            stored = existing_items.pop(current.id, {})
             for item_data in space_data.items:
-                confidence = self._clamp_confidence(item_data.confidence)
-                item = Item(
-                    space_id=space.id,
-                    name=item_data.name or item_data.category.value,
-                    category=item_data.category.value,
-                    technical_specs=item_data.technical_specs,
-                    material_preference=item_data.material_preference,
-                    color_preference=item_data.color_preference,
-                    brand_preference=item_data.brand_preference,
-                    special_instruction=item_data.special_instruction,
-                    quantity=item_data.quantity,
-                    confidence=confidence,
-                    is_accepted=None,
-                )
-                self.session.add(item)
+                matches = stored.get(item_key(item_data.name, item_data.category))
+                values = self._item_row(current.id, item_data)
+                if not matches:
+                    item_inserts.append(values)
+                    continue
+                item = matches.pop(0)
+                if _human_owned(item):
+                    continue
+                del values["is_accepted"]
+                if _changed(item, values):
+                    item_updates.append({"id": item.id, **values, "version": item.version + 1, "updated_at": now})
+            stale_item_ids.extend(row.id for rows in stored.values() for row in rows if not _human_owned(row))
 
-        # 5) Link document to project
-        document.project_id = project.id
-        await self.session.commit()
-        return project.id
+        stale_space_ids = []
+        for row in (row for rows in existing_spaces.values() for row in rows):
+            leftover = [item for items in existing_items.pop(row.id, {}).values() for item in items]
+            stale_item_ids.extend(item.id for item in leftover if not _human_owned(item))
+            if row.source != "manual" and not any(_human_owned(item) for item in leftover):
+                stale_space_ids.append(row.id)
+
+        if stale_item_ids:
+            await self.session.execute(
+                delete(Item).where(Item.id.in_(stale_item_ids)),
+                execution_options={"synchronize_session": False},
+            )
+        if stale_space_ids:
+            await self.session.execute(
+                delete(Space).where(Space.id.in_(stale_space_ids)),
+                execution_options={"synchronize_session": False},
+            )
+        if space_updates:
+            await self.session.execute(update(Space), space_updates)
+        if item_updates:
+            await self.session.execute(update(Item), item_updates)
+        new_space_ids = await self._insert_spaces(project_id, new_spaces)
+        item_inserts.extend(
+            self._item_row(space_id, item_data)
+            for space_id, space_data in zip(new_space_ids, new_spaces)
+            for item_data in space_data.items
+        )
+        if item_inserts:
+            await self.session.execute(insert(Item), item_inserts)
+
+        stats.update(
+            spaces_inserted=len(new_space_ids),
+            spaces_updated=len(space_updates),
+            spaces_deleted=len(stale_space_ids),
+            items_inserted=len(item_inserts),
+            items_updated=len(item_updates),
+            items_deleted=len(stale_item_ids),
+        )
+        return stats
+
+    async def _insert_spaces(self, project_id: int, spaces) -> List[int]:
+        if not spaces:
+            return []
+        result = await self.session.scalars(
+            insert(Space).returning(Space.id, sort_by_parameter_order=True),
+            [
+                {
+                    "project_id": project_id,
+                    "room_type": space_data.room_type,
+                    "dimension": space_data.dimension,
+                    "area": space_data.area,
+                }
+                for space_data in spaces
+            ],
+        )
+        return list(result.all())
+
+    def _item_row(self, space_id: int, item_data) -> dict:
+        return {
+            "space_id": space_id,
+            "name": item_data.name or item_data.category.value,
+            "category": item_data.category.value,
+            "technical_specs": item_data.technical_specs,
+            "material_preference": item_data.material_preference,
+            "color_preference": item_data.color_preference,
+            "brand_preference": item_data.brand_preference,
+            "special_instruction": item_data.special_instruction,
+            "quantity": item_data.quantity,
+            "confidence": self._clamp_confidence(item_data.confidence),
+            "is_accepted": None,
+        }
 
     def _clamp_confidence(self, value):
         if value is None:
@@ -119,3 +314,41 @@ class OrchestratorAgent:
             return max(0.0, min(1.0, float(value)))
         except Exception:
             return None
+
+
+_SPACE_COLUMNS = (Space.id, Space.room_type, Space.dimension, Space.area, Space.source, Space.version)
+_ITEM_COLUMNS = (
+    Item.id,
+    Item.space_id,
+    Item.name,
+    Item.category,
+    Item.technical_specs,
+    Item.material_preference,
+    Item.color_preference,
+    Item.brand_preference,
+    Item.special_instruction,
+    Item.quantity,
+    Item.confidence,
+    Item.is_accepted,
+    Item.source,
+    Item.version,
+)
+
+
+def _human_owned(row) -> bool:
+    """Reviewed or manually added items; re-analysis leaves them alone."""
+    return row.is_accepted is not None or row.source == "manual"
+
+
+def _changed(row, values: dict) -> bool:
+    """True when any value differs from the stored row (floats compared with a small tolerance)."""
+    for name, value in values.items():
+        if name == "space_id":
+            continue
+        stored = getattr(row, name)
+        if isinstance(value, float) and isinstance(stored, float):
+            if abs(value - stored) > 1e-6:
+                return True
+        elif stored != value:
+            return True
+    return False
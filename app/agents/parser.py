@@ -1,10 +1,26 @@
 import asyncio
-from dataclasses import dataclass
-from typing import List, Optional
+import json
+import multiprocessing
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
 
-import docx
 from pypdf import PdfReader
 
+from app.core.cache import DiskLRUCache, sha256_file
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Bump whenever parsing output changes so stale cache entries are ignored.
+PARSER_VERSION = "2"
+
 
 @dataclass
 class DocumentContent:
@@ -13,53 +29,301 @@ class DocumentContent:
     tables: Optional[List[str]] = None  # tables rendered as markdown-ish strings
 
 
+class ParseCache:
+    """Content-addressed cache of parsed documents, keyed by file SHA-256 and parser version."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.store = DiskLRUCache(directory, max_bytes)
+        self._lock = threading.Lock()
+        self.seconds_saved = 0.0
+
+    def _key(self, digest: str) -> str:
+        return f"{PARSER_VERSION}:{digest}"
+
+    def get(self, digest: str) -> Optional[DocumentContent]:
+        raw = self.store.get(self._key(digest))
+        if raw is None:
+            return None
+        try:
+            payload = json.loads(raw)
+            content = DocumentContent(**payload["content"])
+        except Exception:
+            self.store.delete(self._key(digest))
+            return None
+        with self._lock:
+            self.seconds_saved += payload.get("parse_seconds", 0.0)
+        return content
+
+    def set(self, digest: str, content: DocumentContent, parse_seconds: float) -> None:
+        payload = {"content": asdict(content), "parse_seconds": parse_seconds}
+        self.store.set(self._key(digest), json.dumps(payload, default=str).encode("utf-8"))
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.store.stats(), "seconds_saved": round(self.seconds_saved, 3), "parser_version": PARSER_VERSION}
+
+
+parse_cache = ParseCache(settings.PARSE_CACHE_DIR, settings.PARSE_CACHE_MAX_BYTES)
+
+
+def _format_page(page, page_number: int) -> str:
+    """Render a single page as a `[Page N]` block; best-effort on extraction errors."""
+    try:
+        page_text = page.extract_text() or ""
+    except Exception:
+        page_text = ""
+    return f"[Page {page_number}]\n{page_text.strip()}"
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Worker entry point: open the PDF independently and render pages [start, stop)."""
+    reader = PdfReader(file_path)
+    return [_format_page(reader.pages[idx], idx + 1) for idx in range(start, stop)]
+
+
+def _split_page_range(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous, near-equal ranges."""
+    parts = max(1, min(parts, page_count))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for idx in range(parts):
+        stop = start + size + (1 if idx < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_VAL = f"{_W}val"
+
+
+def _run_text(run: ET.Element) -> str:
+    """Text of a `w:r`, mirroring python-docx's treatment of tabs, breaks and hyphens."""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == f"{_W}t":
+            parts.append(child.text or "")
+        elif tag in (f"{_W}tab", f"{_W}ptab"):
+            parts.append("\t")
+        elif tag == f"{_W}br":
+            if child.get(f"{_W}type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == f"{_W}cr":
+            parts.append("\n")
+        elif tag == f"{_W}noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _paragraph_text(para: ET.Element) -> str:
+    """Text of a `w:p` from its direct runs and hyperlink runs."""
+    parts = []
+    for child in para:
+        if child.tag == f"{_W}r":
+            parts.append(_run_text(child))
+        elif child.tag == f"{_W}hyperlink":
+            parts.extend(_run_text(run) for run in child.iterfind(f"{_W}r"))
+    return "".join(parts)
+
+
+def _int_prop(parent: Optional[ET.Element], path: str, default: int) -> int:
+    node = parent.find(path) if parent is not None else None
+    if node is None:
+        return default
+    try:
+        return int(node.get(_W_VAL, default))
+    except ValueError:
+        return default
+
+
+def _table_rows(tbl: ET.Element) -> List[List[str]]:
+    """Cell texts per row; spans repeat per grid column and vertical merges reuse the origin text."""
+    rows: List[List[str]] = []
+    above: Dict[int, str] = {}
+    for tr in tbl.iterfind(f"{_W}tr"):
+        offset = _int_prop(tr.find(f"{_W}trPr"), f"{_W}gridBefore", 0)
+        cells: List[str] = []
+        current: Dict[int, str] = {}
+        for tc in tr.iterfind(f"{_W}tc"):
+            tc_pr = tc.find(f"{_W}tcPr")
+            span = max(1, _int_prop(tc_pr, f"{_W}gridSpan", 1))
+            v_merge = tc_pr.find(f"{_W}vMerge") if tc_pr is not None else None
+            if v_merge is not None and v_merge.get(_W_VAL, "continue") == "continue":
+                text = above.get(offset, "")
+            else:
+                text = "\n".join(_paragraph_text(p) for p in tc.iterfind(f"{_W}p")).strip()
+            for col in range(offset, offset + span):
+                current[col] = text
+                cells.append(text)
+            offset += span
+        above = current
+        rows.append(cells)
+    return rows
+
+
+def _table_markdown(rows: List[List[str]]) -> Optional[str]:
+    if not rows:
+        return None
+    header, *body = rows
+    if not header:
+        return None
+    md_header = "| " + " | ".join(header) + " |"
+    md_sep = "| " + " | ".join(["---"] * len(header)) + " |"
+    md_rows = ["| " + " | ".join(r) + " |" for r in body]
+    return "\n".join([md_header, md_sep, *md_rows])
+
+
+def iter_docx_blocks(file_path: str) -> Iterator[Tuple[str, object]]:
+    """
+    Stream top-level body blocks of a DOCX in document order.
+
+    Yields ("paragraph", text) and ("table", rows). Each block is discarded once emitted,
+    so memory is bounded by the largest single block rather than the document.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        depth = 0
+        body: Optional[ET.Element] = None
+        for event, elem in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 2 and elem.tag == f"{_W}body":
+                    body = elem
+                continue
+            if depth == 3 and body is not None:
+                if elem.tag == f"{_W}p":
+                    yield "paragraph", _paragraph_text(elem)
+                elif elem.tag == f"{_W}tbl":
+                    yield "table", _table_rows(elem)
+                body.remove(elem)
+            elif depth == 2:
+                body = None
+            depth -= 1
+
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by every parse, created on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn (not fork): the API process runs threads and an event loop.
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=max(workers, settings.PDF_PARSE_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the shared PDF worker processes; called from the app lifespan."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        pool, _pdf_pool = _pdf_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _discard_pdf_pool(pool: ProcessPoolExecutor) -> None:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
 class DocumentParserAgent:
     """Deterministic parser for PDF/DOCX; no LLM involvement."""
 
+    def __init__(
+        self,
+        pdf_workers: Optional[int] = None,
+        pdf_parallel_threshold: Optional[int] = None,
+    ):
+        self.pdf_workers = pdf_workers if pdf_workers is not None else settings.PDF_PARSE_WORKERS
+        self.pdf_parallel_threshold = (
+            pdf_parallel_threshold
+            if pdf_parallel_threshold is not None
+            else settings.PDF_PARALLEL_PAGE_THRESHOLD
+        )
+
     def parse_pdf(self, file_path: str) -> DocumentContent:
-        """Parse PDF to text; best-effort per page."""
+        """Parse PDF to text; best-effort per page, page-parallel for large files."""
         reader = PdfReader(file_path)
-        pages = []
-        for idx, page in enumerate(reader.pages, start=1):
-            try:
-                page_text = page.extract_text() or ""
-            except Exception:
-                page_text = ""
-            pages.append(f"[Page {idx}]\n{page_text.strip()}")
+        page_count = len(reader.pages)
+        if self.pdf_workers > 1 and page_count >= self.pdf_parallel_threshold:
+            pages = self._extract_pages_parallel(file_path, page_count)
+        else:
+            pages = [_format_page(page, idx) for idx, page in enumerate(reader.pages, start=1)]
         text = "\n\n".join(pages)
-        metadata = reader.metadata if reader.metadata else {}
+        info = reader.metadata
+        metadata = {str(key): str(info[key]) for key in info} if info else {}
         return DocumentContent(text=text, metadata=metadata, tables=None)
 
+    def _extract_pages_parallel(self, file_path: str, page_count: int) -> List[str]:
+        """Fan page ranges out to the shared process pool and reassemble blocks in page order.
+
+        Concurrent parses queue on the same PDF_PARSE_WORKERS processes instead of each
+        spawning their own.
+        """
+        ranges = _split_page_range(page_count, self.pdf_workers)
+        pool = _get_pdf_pool(self.pdf_workers)
+        try:
+            futures = [pool.submit(_extract_page_range, file_path, start, stop) for start, stop in ranges]
+            pages: List[str] = []
+            for future in futures:
+                pages.extend(future.result())
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next parse
+            _discard_pdf_pool(pool)
+            raise
+        return pages
+
     def parse_docx(self, file_path: str) -> DocumentContent:
-        """Parse DOCX paragraphs and tables."""
-        doc = docx.Document(file_path)
-        paras = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                paras.append(para.text)
-        text = "\n".join(paras)
+        """Parse DOCX paragraphs and tables in a single streaming pass over document.xml."""
+        paras: List[str] = []
         tables_md: List[str] = []
-        for tbl in doc.tables:
-            rows = []
-            for row in tbl.rows:
-                cells = [cell.text.strip() for cell in row.cells]
-                rows.append(cells)
-            if rows:
-                header, *body = rows
-                if header:
-                    md_header = "| " + " | ".join(header) + " |"
-                    md_sep = "| " + " | ".join(["---"] * len(header)) + " |"
-                    md_rows = ["| " + " | ".join(r) + " |" for r in body]
-                    tables_md.append("\n".join([md_header, md_sep, *md_rows]))
+        for kind, block in iter_docx_blocks(file_path):
+            if kind == "paragraph":
+                if block.strip():
+                    paras.append(block)
+            else:
+                table = _table_markdown(block)
+                if table:
+                    tables_md.append(table)
+        text = "\n".join(paras)
         return DocumentContent(text=text, metadata={}, tables=tables_md or None)
 
-    def parse_file(self, file_path: str) -> DocumentContent:
+    def parse_file(self, file_path: str, digest: Optional[str] = None) -> DocumentContent:
+        """Parse a file, serving repeat parses of identical bytes from the parse cache.
+
+        digest is the file's SHA-256 when already known (recorded at upload), saving a re-hash.
+        """
+        if not settings.PARSE_CACHE_ENABLED:
+            return self._parse_uncached(file_path)
+        digest = digest or sha256_file(file_path)
+        cached = parse_cache.get(digest)
+        if cached is not None:
+            logger.info("Parse cache hit", extra={"file_path": file_path, "sha256": digest})
+            return cached
+        started = time.perf_counter()
+        content = self._parse_uncached(file_path)
+        try:
+            parse_cache.set(digest, content, time.perf_counter() - started)
+        except OSError as exc:
+            logger.warning("Parse cache write failed", extra={"file_path": file_path, "error": str(exc)})
+        return content
+
+    def _parse_uncached(self, file_path: str) -> DocumentContent:
         if file_path.endswith(".pdf"):
             return self.parse_pdf(file_path)
         if file_path.endswith(".docx"):
             return self.parse_docx(file_path)
         raise ValueError("Unsupported file format")
 
-    async def parse_file_async(self, file_path: str) -> DocumentContent:
+    async def parse_file_async(self, file_path: str, digest: Optional[str] = None) -> DocumentContent:
         """Async wrapper to avoid blocking the event loop."""
-        return await asyncio.to_thread(self.parse_file, file_path)
+        return await asyncio.to_thread(self.parse_file, file_path, digest)
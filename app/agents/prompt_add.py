@@ -5,6 +5,7 @@ from pathlib import Path
 
 from pydantic_ai import Agent
 
+from app.agents.llm import run_agent
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.models.models import SpaceRequirements
@@ -26,20 +27,26 @@ class PromptAddAgent:
             system_prompt=PROMPT_ADD_PROMPT,
         )
 
-    async def generate_additions(self, context_summary: str, user_prompt: str) -> List[SpaceRequirements]:
+    async def generate_additions(
+        self, context_summary: str, user_prompt: str, use_cache: bool = True
+    ) -> List[SpaceRequirements]:
         payload = {
             "current_spaces": context_summary,
             "user_prompt": user_prompt,
         }
         try:
-            run = await self.agent.run(
+            return await run_agent(
+                "prompt_add",
+                self.agent,
                 "Current project summary:\n"
                 f"{context_summary}\n\n"
                 "User prompt (additions only):\n"
                 f"{user_prompt}\n\n"
                 "Return ONLY the spaces/items to add as JSON.",
+                system_prompt=PROMPT_ADD_PROMPT,
+                output_type=List[SpaceRequirements],
+                use_cache=use_cache,
             )
-            return run.output
         except Exception as exc:
             logger.exception("Prompt-based additions failed", extra={"error": str(exc), "payload": json.dumps(payload)})
             raise
@@ -0,0 +1,91 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.models.models import ExtractionResult, ItemRequirement, ProjectMetadata, SpaceRequirements
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so near-identical labels compare equal."""
+    return _NON_WORD.sub(" ", (value or "").lower()).strip()
+
+
+def category_value(category) -> str:
+    return category.value if hasattr(category, "value") else str(category)
+
+
+def item_key(name: Optional[str], category) -> Tuple[str, str]:
+    """Stable identity of an item within a space: normalized name (falling back to category) and category."""
+    cat = category_value(category)
+    return normalize_key(name or cat), cat
+
+
+def _first(*values):
+    for value in values:
+        if value is not None and (not isinstance(value, str) or value.strip()):
+            return value
+    return None
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def _merge_item(base: ItemRequirement, other: ItemRequirement) -> ItemRequirement:
+    return ItemRequirement(
+        name=_first(base.name, other.name),
+        category=base.category,
+        technical_specs=_first(base.technical_specs, other.technical_specs),
+        material_preference=_first(base.material_preference, other.material_preference),
+        color_preference=_first(base.color_preference, other.color_preference),
+        brand_preference=_first(base.brand_preference, other.brand_preference),
+        special_instruction=_first(base.special_instruction, other.special_instruction),
+        quantity=_max(base.quantity, other.quantity),
+        confidence=_max(base.confidence, other.confidence),
+        is_accepted=base.is_accepted,
+    )
+
+
+def merge_extraction_results(results: List[ExtractionResult]) -> ExtractionResult:
+    """
+    Deterministically reduce per-chunk extractions into one result.
+
+    Metadata fields take the first non-empty value in chunk order. Spaces merge by normalized
+    room_type and items by normalized name + category, keeping first-seen order; duplicated
+    items (typically from chunk overlap) keep the first non-empty value of each field and the
+    larger quantity.
+    """
+    metadata = ProjectMetadata()
+    for result in results:
+        for field, value in result.project_metadata.model_dump().items():
+            setattr(metadata, field, _first(getattr(metadata, field), value))
+
+    spaces: Dict[str, SpaceRequirements] = {}
+    space_items: Dict[str, Dict[Tuple[str, str], ItemRequirement]] = {}
+    for result in results:
+        for space in result.spaces:
+            key = normalize_key(space.room_type)
+            merged = spaces.get(key)
+            if merged is None:
+                merged = spaces[key] = SpaceRequirements(
+                    room_type=space.room_type,
+                    dimension=space.dimension,
+                    area=space.area,
+                )
+                space_items[key] = {}
+            else:
+                merged.dimension = _first(merged.dimension, space.dimension)
+                merged.area = _first(merged.area, space.area)
+            items = space_items[key]
+            for item in space.items:
+                ikey = item_key(item.name, item.category)
+                items[ikey] = _merge_item(items[ikey], item) if ikey in items else item.model_copy()
+
+    for key, space in spaces.items():
+        space.items = list(space_items[key].values())
+    return ExtractionResult(project_metadata=metadata, spaces=list(spaces.values()))
@@ -8,7 +8,7 @@ from alembic import context
 # Import Base and your models
 from app.entities.entities import Base
 # Ensure all models are imported so they are registered with Base
-from app.entities.entities import Project, Space, Item, Document
+from app.entities.entities import Project, Space, Item, Document, LLMCacheEntry
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
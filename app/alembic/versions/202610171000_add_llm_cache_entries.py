@@ -0,0 +1,39 @@
+"""Add llm_cache_entries table for the Postgres LLM response cache backend.
+
+Revision ID: 202610171000
+Revises: 202512012237
+Create Date: 2026-10-17 10:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171000"
+down_revision: Union[str, Sequence[str], None] = "202512012237"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create llm_cache_entries with indexes for expiry and LRU pruning."""
+    op.create_table(
+        "llm_cache_entries",
+        sa.Column("key", sa.String(64), primary_key=True),
+        sa.Column("agent", sa.String(), nullable=False),
+        sa.Column("value", sa.Text(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_accessed_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_llm_cache_entries_last_accessed_at", "llm_cache_entries", ["last_accessed_at"])
+    op.create_index("ix_llm_cache_entries_expires_at", "llm_cache_entries", ["expires_at"])
+
+
+def downgrade() -> None:
+    """Drop llm_cache_entries."""
+    op.drop_index("ix_llm_cache_entries_expires_at", table_name="llm_cache_entries")
+    op.drop_index("ix_llm_cache_entries_last_accessed_at", table_name="llm_cache_entries")
+    op.drop_table("llm_cache_entries")
@@ -0,0 +1,47 @@
+"""Indexes for keyset-paginated document listing; upload_date becomes NOT NULL.
+
+Revision ID: 202610171100
+Revises: 202610171000
+Create Date: 2026-10-17 11:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171100"
+down_revision: Union[str, Sequence[str], None] = "202610171000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Backfill upload_date so every row has a keyset position, then add the listing indexes."""
+    op.execute("UPDATE documents SET upload_date = created_at WHERE upload_date IS NULL")
+    op.alter_column("documents", "upload_date", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_documents_upload_date_id",
+        "documents",
+        [sa.text("upload_date DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_documents_unanalyzed_upload_date_id",
+        "documents",
+        [sa.text("upload_date DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text("project_id IS NULL"),
+    )
+    op.create_index(
+        "ix_documents_filename_prefix",
+        "documents",
+        ["filename"],
+        postgresql_ops={"filename": "varchar_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Drop the listing indexes and allow NULL upload_date again."""
+    op.drop_index("ix_documents_filename_prefix", table_name="documents")
+    op.drop_index("ix_documents_unanalyzed_upload_date_id", table_name="documents")
+    op.drop_index("ix_documents_upload_date_id", table_name="documents")
+    op.alter_column("documents", "upload_date", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,37 @@
+"""Index the foreign keys behind every hot lookup, plus accepted items for exports.
+
+Revision ID: 202610171200
+Revises: 202610171100
+Create Date: 2026-10-17 12:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171200"
+down_revision: Union[str, Sequence[str], None] = "202610171100"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """(fk, id) b-trees serve both the filter and the ORDER BY id used by reads and exports."""
+    op.create_index("ix_spaces_project_id_id", "spaces", ["project_id", "id"])
+    op.create_index("ix_items_space_id_id", "items", ["space_id", "id"])
+    op.create_index("ix_documents_project_id", "documents", ["project_id"])
+    op.create_index(
+        "ix_items_accepted_space_id_id",
+        "items",
+        ["space_id", "id"],
+        postgresql_where=sa.text("is_accepted IS TRUE"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the foreign key indexes."""
+    op.drop_index("ix_items_accepted_space_id_id", table_name="items")
+    op.drop_index("ix_documents_project_id", table_name="documents")
+    op.drop_index("ix_items_space_id_id", table_name="items")
+    op.drop_index("ix_spaces_project_id_id", table_name="spaces")
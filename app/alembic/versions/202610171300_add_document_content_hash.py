@@ -0,0 +1,30 @@
+"""Record content hash and size of uploaded documents.
+
+Revision ID: 202610171300
+Revises: 202610171200
+Create Date: 2026-10-17 13:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171300"
+down_revision: Union[str, Sequence[str], None] = "202610171200"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Nullable so documents uploaded before content-addressed storage stay valid."""
+    op.add_column("documents", sa.Column("content_sha256", sa.String(64), nullable=True))
+    op.add_column("documents", sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+    op.create_index("ix_documents_content_sha256", "documents", ["content_sha256"])
+
+
+def downgrade() -> None:
+    """Drop content hash and size."""
+    op.drop_index("ix_documents_content_sha256", table_name="documents")
+    op.drop_column("documents", "size_bytes")
+    op.drop_column("documents", "content_sha256")
@@ -0,0 +1,28 @@
+"""Record whether spaces and items came from extraction or were added by hand.
+
+Revision ID: 202610171400
+Revises: 202610171300
+Create Date: 2026-10-17 14:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "202610171400"
+down_revision: Union[str, Sequence[str], None] = "202610171300"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Existing rows cannot be told apart and default to extraction."""
+    op.add_column("spaces", sa.Column("source", sa.String(16), nullable=False, server_default="extraction"))
+    op.add_column("items", sa.Column("source", sa.String(16), nullable=False, server_default="extraction"))
+
+
+def downgrade() -> None:
+    """Drop source columns."""
+    op.drop_column("items", "source")
+    op.drop_column("spaces", "source")
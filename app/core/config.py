@@ -11,6 +11,50 @@ class Settings(BaseSettings):
     JWT_SECRET: str = "change_me"
     JWT_ALGORITHM: str = "HS256"
     API_URL: str = "http://localhost:8000/api"
+    PDF_PARSE_WORKERS: int = 4
+    PDF_PARALLEL_PAGE_THRESHOLD: int = 50
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_DIR: str = "/tmp/rfp_parse_cache"
+    PARSE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    CHUNK_MAX_TOKENS: int = 8000
+    CHUNK_OVERLAP_TOKENS: int = 400
+    EXTRACTION_CONCURRENCY: int = 4
+    EVALUATION_BATCHED: bool = True
+    EVALUATION_BATCH_SIZE: int = 20
+    EVALUATION_CONCURRENCY: int = 4
+    EVALUATION_MAX_RETRIES: int = 2
+    LEXICAL_PRESCORE_ENABLED: bool = True
+    LEXICAL_CONFIDENCE_THRESHOLD: float = 0.85
+    LLM_CACHE_BACKEND: str = "memory"  # memory | disk | postgres | none
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 1000
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    LLM_CACHE_DIR: str = "/tmp/rfp_llm_cache"
+    ANALYSIS_WORKERS: int = 4
+    ANALYSIS_QUEUE_MAX: int = 100
+    ANALYSIS_JOB_RETENTION: int = 500
+    ANALYSIS_PERSIST_MODE: str = "reconcile"  # reconcile | replace
+    ANALYSIS_JSON_AGGREGATION: bool = True
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 256
+    ANALYSIS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    EXPORT_BATCH_SIZE: int = 500
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # 0 when connecting through pgbouncer in transaction mode
+    UPLOAD_DIR: str = "/tmp/rfp_uploads"
+    UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    GZIP_MIN_BYTES: int = 1024
+    # Match these to the provider's limits for OPENAI_MODEL on your account tier.
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 300000
+    LLM_OUTPUT_TOKEN_ESTIMATE: int = 2000
 
     class Config:
         env_file = ".env"
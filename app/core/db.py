@@ -1,12 +1,123 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
 from app.core.config import settings
 
 # Convert sync URL to async
 async_database_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-engine = create_async_engine(async_database_url, echo=True)
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Set per HTTP request by the middleware in app.main; cursor events add to it
+request_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection (including connects)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.checkout_wait_max_seconds = 0.0
+        self.checkout_errors = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.checkout_errors += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_wait_seconds += waited
+                self.checkout_wait_max_seconds = max(self.checkout_wait_max_seconds, waited)
+
+
+engine = create_async_engine(
+    async_database_url,
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # asyncpg's own cache and SQLAlchemy's prepared statement cache; set both to 0 behind pgbouncer
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    },
+)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+_totals = QueryStats()
+_totals_lock = threading.Lock()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = request_query_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    with _totals_lock:
+        _totals.queries += 1
+        _totals.db_seconds += elapsed
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute never fires for a failed statement; drop its start time
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+def db_stats() -> Dict[str, float]:
+    """Pool occupancy, checkout waits and process-wide query totals."""
+    pool = engine.sync_engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "queries": _totals.queries,
+        "db_seconds": round(_totals.db_seconds, 3),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            checkout_wait_seconds=round(pool.checkout_wait_seconds, 3),
+            checkout_wait_max_ms=round(pool.checkout_wait_max_seconds * 1000, 1),
+            checkout_errors=pool.checkout_errors,
+        )
+    return stats
+
+
 async def init_db():
     """Schema is managed by Alembic; no runtime DDL here."""
     return
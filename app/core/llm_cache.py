@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.cache import DiskLRUCache
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.entities.entities import LLMCacheEntry
+
+logger = get_logger(__name__)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    """Storage for serialized LLM responses; values are opaque bytes with a TTL."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, agent: str, value: bytes, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, agent: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._bytes += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    async def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class DiskCacheBackend(CacheBackend):
+    """Shared across workers on one host; reuses the parse cache's disk LRU store."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.store = DiskLRUCache(directory, max_bytes)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raw = await asyncio.to_thread(self.store.get, key)
+        if raw is None:
+            return None
+        expires_at, _, value = raw.partition(b"\n")
+        try:
+            expired = float(expires_at) < time.time()
+        except ValueError:
+            # Unreadable header (e.g. a truncated write): drop it and report a miss
+            expired = True
+        if expired:
+            await asyncio.to_thread(self.store.delete, key)
+            return None
+        return value
+
+    async def set(self, key: str, agent: str, value: bytes, ttl_seconds: int) -> None:
+        envelope = f"{time.time() + ttl_seconds}\n".encode("utf-8") + value
+        await asyncio.to_thread(self.store.set, key, envelope)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.store.delete, key)
+
+
+class PostgresCacheBackend(CacheBackend):
+    """Shared across hosts via the llm_cache_entries table; LRU by last access, pruned on write."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+    async def get(self, key: str) -> Optional[bytes]:
+        async with AsyncSessionLocal() as session:
+            entry = await session.get(LLMCacheEntry, key)
+            if entry is None or entry.expires_at < datetime.utcnow():
+                return None
+            entry.last_accessed_at = datetime.utcnow()
+            await session.commit()
+            return entry.value.encode("utf-8")
+
+    async def set(self, key: str, agent: str, value: bytes, ttl_seconds: int) -> None:
+        now = datetime.utcnow()
+        row = {
+            "key": key,
+            "agent": agent,
+            "value": value.decode("utf-8"),
+            "size_bytes": len(value),
+            "created_at": now,
+            "last_accessed_at": now,
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        }
+        stmt = pg_insert(LLMCacheEntry).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={k: stmt.excluded[k] for k in row if k != "key"},
+        )
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt)
+            await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at < now))
+            count = await session.scalar(select(func.count()).select_from(LLMCacheEntry))
+            if count > self.max_entries:
+                oldest = (
+                    select(LLMCacheEntry.key)
+                    .order_by(LLMCacheEntry.last_accessed_at)
+                    .limit(count - self.max_entries)
+                )
+                await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(oldest)))
+            await session.commit()
+
+    async def delete(self, key: str) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key == key))
+            await session.commit()
+
+
+class LLMResponseCache:
+    """Keyed LLM response cache with per-agent hit/miss/latency-saved counters."""
+
+    def __init__(self, backend: Optional[CacheBackend], ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, output_schema: str, prompt: str) -> str:
+        parts = [model, _sha256(system_prompt), _sha256(output_schema), _sha256(prompt)]
+        return _sha256("|".join(parts))
+
+    def _record(self, agent: str, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                agent, {"hits": 0, "misses": 0, "bypassed": 0, "errors": 0, "latency_saved_seconds": 0.0}
+            )
+            stats[counter] += amount
+
+    def record_bypass(self, agent: str) -> None:
+        self._record(agent, "bypassed")
+
+    async def get(self, agent: str, key: str) -> Optional[bytes]:
+        """Return the cached output payload, or None on miss/disabled/backend error."""
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(key)
+        except Exception as exc:
+            self._record(agent, "errors")
+            logger.warning("LLM cache read failed", extra={"agent": agent, "error": str(exc)})
+            return None
+        if raw is None:
+            self._record(agent, "misses")
+            return None
+        try:
+            envelope = json.loads(raw)
+            output = envelope["output"].encode("utf-8")
+            latency_seconds = float(envelope.get("latency_seconds", 0.0))
+        except (ValueError, TypeError, KeyError, AttributeError) as exc:
+            # Truncated or corrupt entry: treat as a miss and drop it so the next write replaces it
+            self._record(agent, "errors")
+            self._record(agent, "misses")
+            logger.warning("LLM cache entry corrupt", extra={"agent": agent, "key": key, "error": str(exc)})
+            try:
+                await self.backend.delete(key)
+            except Exception as exc:
+                logger.warning("LLM cache evict failed", extra={"agent": agent, "error": str(exc)})
+            return None
+        self._record(agent, "hits")
+        self._record(agent, "latency_saved_seconds", latency_seconds)
+        return output
+
+    async def set(self, agent: str, key: str, output: bytes, latency_seconds: float) -> None:
+        if self.backend is None:
+            return
+        envelope = json.dumps({"output": output.decode("utf-8"), "latency_seconds": latency_seconds})
+        try:
+            await self.backend.set(key, agent, envelope.encode("utf-8"), self.ttl_seconds)
+        except Exception as exc:
+            self._record(agent, "errors")
+            logger.warning("LLM cache write failed", extra={"agent": agent, "error": str(exc)})
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            agents = {}
+            for agent, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                agents[agent] = {
+                    **stats,
+                    "latency_saved_seconds": round(stats["latency_saved_seconds"], 3),
+                    "hit_ratio": (stats["hits"] / lookups) if lookups else 0.0,
+                }
+        return {"backend": settings.LLM_CACHE_BACKEND, "ttl_seconds": self.ttl_seconds, "agents": agents}
+
+
+def build_backend(name: str) -> Optional[CacheBackend]:
+    if name == "memory":
+        return MemoryCacheBackend(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_MAX_BYTES)
+    if name == "disk":
+        return DiskCacheBackend(settings.LLM_CACHE_DIR, settings.LLM_CACHE_MAX_BYTES)
+    if name == "postgres":
+        return PostgresCacheBackend(settings.LLM_CACHE_MAX_ENTRIES)
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown LLM_CACHE_BACKEND: {name}")
+
+
+llm_cache = LLMResponseCache(build_backend(settings.LLM_CACHE_BACKEND), settings.LLM_CACHE_TTL_SECONDS)
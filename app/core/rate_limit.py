@@ -0,0 +1,88 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take `amount` (capped at capacity) from the bucket; returns seconds spent waiting."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """Correct a previous estimate: positive amounts debit, negative amounts refund."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMRateLimiter:
+    """Process-wide cap on concurrent LLM calls plus requests/min and tokens/min budgets."""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int):
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+        self.calls = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[None]:
+        started = time.monotonic()
+        async with self.semaphore:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            self.wait_seconds += time.monotonic() - started
+            self.in_flight += 1
+            self.calls += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Reconcile the token bucket with the usage the provider actually reported."""
+        self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "tokens_available": round(self.tokens.tokens, 1),
+        }
+
+
+llm_rate_limiter = LLMRateLimiter(
+    settings.LLM_MAX_CONCURRENCY,
+    settings.LLM_REQUESTS_PER_MINUTE,
+    settings.LLM_TOKENS_PER_MINUTE,
+)
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds UPLOAD_MAX_BYTES."""
+
+
+@dataclass
+class StoredFile:
+    path: str
+    sha256: str
+    size_bytes: int
+
+
+def content_path(digest: str, filename: str) -> str:
+    """Content-addressed location: UPLOAD_DIR/ab/abcdef....ext"""
+    ext = os.path.splitext(filename or "")[1].lower()
+    return os.path.join(settings.UPLOAD_DIR, digest[:2], f"{digest}{ext}")
+
+
+def _write_chunk(fh, digest, chunk: bytes) -> None:
+    fh.write(chunk)
+    digest.update(chunk)
+
+
+def _discard_partial(fh, tmp_path: str) -> None:
+    fh.close()
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def store_upload(file: UploadFile) -> StoredFile:
+    """
+    Copy an upload to content-addressed storage without blocking the event loop.
+
+    Chunks are read asynchronously, hashed and written in a worker thread, and the size limit
+    is enforced as bytes arrive. Identical content lands on the same path, so re-uploads
+    never duplicate bytes on disk and different files with one name never collide.
+    """
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise UploadTooLarge(f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+
+    tmp_dir = os.path.join(settings.UPLOAD_DIR, "tmp")
+    await asyncio.to_thread(os.makedirs, tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    fh = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > settings.UPLOAD_MAX_BYTES:
+                raise UploadTooLarge(f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+            await asyncio.to_thread(_write_chunk, fh, digest, chunk)
+        await asyncio.to_thread(fh.close)
+        sha256 = digest.hexdigest()
+        path = content_path(sha256, file.filename)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(path), exist_ok=True)
+        await asyncio.to_thread(os.replace, tmp_path, path)
+    except BaseException:
+        await asyncio.to_thread(_discard_partial, fh, tmp_path)
+        raise
+    return StoredFile(path=path, sha256=sha256, size_bytes=size)
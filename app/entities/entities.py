@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Boolean, Text, Index, BigInteger
 from sqlalchemy.orm import relationship, DeclarativeBase
 from datetime import datetime
 from typing import List, Optional
@@ -36,10 +36,26 @@ class Document(BaseSQLEntity):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=True)
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=True) # Optional: if we store the file
-    upload_date = Column(DateTime, default=datetime.utcnow)
+    upload_date = Column(DateTime, default=datetime.utcnow, nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    size_bytes = Column(BigInteger, nullable=True)
 
     project = relationship("Project", back_populates="documents")
 
+    __table_args__ = (
+        # Keyset pagination on (upload_date, id), newest first
+        Index("ix_documents_upload_date_id", upload_date.desc(), id.desc()),
+        Index(
+            "ix_documents_unanalyzed_upload_date_id",
+            upload_date.desc(),
+            id.desc(),
+            postgresql_where=project_id.is_(None),
+        ),
+        # Filename prefix search (LIKE 'abc%') independent of the database collation
+        Index("ix_documents_filename_prefix", filename, postgresql_ops={"filename": "varchar_pattern_ops"}),
+        Index("ix_documents_project_id", project_id),
+    )
+
 class Space(BaseSQLEntity):
     __tablename__ = "spaces"
 
@@ -48,10 +64,14 @@ class Space(BaseSQLEntity):
     room_type = Column(String, nullable=False)
     dimension = Column(String, nullable=True)
     area = Column(String, nullable=True)
+    # "extraction" or "manual"; re-analysis never removes manual rows
+    source = Column(String(16), nullable=False, default="extraction", server_default="extraction")
 
     project = relationship("Project", back_populates="spaces")
     items = relationship("Item", back_populates="space", cascade="all, delete-orphan")
 
+    __table_args__ = (Index("ix_spaces_project_id_id", project_id, id),)
+
 class Item(BaseSQLEntity):
     __tablename__ = "items"
 
@@ -67,5 +87,23 @@ class Item(BaseSQLEntity):
     quantity = Column(Integer, nullable=True)
     confidence = Column(Float, nullable=True)
     is_accepted = Column(Boolean, nullable=True)
+    source = Column(String(16), nullable=False, default="extraction", server_default="extraction")
 
     space = relationship("Space", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_items_space_id_id", space_id, id),
+        # Exports read only accepted items
+        Index("ix_items_accepted_space_id_id", space_id, id, postgresql_where=is_accepted.is_(True)),
+    )
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache_entries"
+
+    key = Column(String(64), primary_key=True)
+    agent = Column(String, nullable=False)
+    value = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,10 +1,15 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.core.db import init_db
+from app.agents.parser import shutdown_pdf_pool
+from app.core.config import settings
+from app.core.db import QueryStats, init_db, request_query_stats
 from app.core.logging import setup_logging, get_logger
 from app.routes.routes import router
+from app.services.analysis_jobs import analysis_job_service
 
 logger = get_logger(__name__)
 
@@ -13,11 +18,33 @@ async def lifespan(app: FastAPI):
     setup_logging()
     logger.info("Starting application")
     await init_db()
+    await analysis_job_service.start()
     yield
     logger.info("Shutting down application")
+    await analysis_job_service.stop()
+    await asyncio.to_thread(shutdown_pdf_pool)
 
 app = FastAPI(title="RFP Agentic System", lifespan=lifespan)
 app.include_router(router, prefix="/api")
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES)
+
+@app.middleware("http")
+async def db_usage_headers(request: Request, call_next):
+    """Report per-request query count and DB time (X-DB-Queries / X-DB-Time-Ms)."""
+    stats = QueryStats()
+    token = request_query_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        request_query_stats.reset(token)
+    response.headers["X-DB-Queries"] = str(stats.queries)
+    response.headers["X-DB-Time-Ms"] = f"{stats.db_seconds * 1000:.1f}"
+    if stats.queries:
+        logger.debug(
+            "Request DB usage",
+            extra={"path": request.url.path, "queries": stats.queries, "db_ms": round(stats.db_seconds * 1000, 1)},
+        )
+    return response
 
 @app.get("/")
 def read_root():
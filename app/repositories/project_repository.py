@@ -1,12 +1,61 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
+from sqlalchemy import Boolean, Integer, Text, and_, case, cast, column, func, literal_column, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.engine import Row
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 
 from app.core.logging import get_logger
 from app.entities.entities import Project, Space, Item, Document
 
 logger = get_logger(__name__)
 
+# Item columns reviewers may edit; anything else in an update payload is ignored
+REVIEWABLE_FIELDS = (
+    "name",
+    "category",
+    "technical_specs",
+    "material_preference",
+    "color_preference",
+    "brand_preference",
+    "special_instruction",
+    "quantity",
+    "confidence",
+    "is_accepted",
+)
+# Rows per UPDATE ... FROM (VALUES) statement; keeps bind parameters well under the driver limit
+REVIEW_VALUES_CHUNK = 500
+
+# Field order of the analysis payload, shared by the ORM and JSON-aggregation read paths
+ANALYSIS_PROJECT_FIELDS = ("id", "name", "client_type", "location", "timeline", "budget_range", "created_at")
+ANALYSIS_SPACE_FIELDS = ("id", "room_type", "dimension", "area")
+ANALYSIS_ITEM_FIELDS = (
+    "id",
+    "name",
+    "category",
+    "technical_specs",
+    "material_preference",
+    "color_preference",
+    "brand_preference",
+    "special_instruction",
+    "quantity",
+    "confidence",
+    "is_accepted",
+    "version",
+)
+
+
+def _json_pairs(fields, entity) -> list:
+    pairs = []
+    for name in fields:
+        pairs += [literal_column(f"'{name}'"), getattr(entity, name)]
+    return pairs
+
+
+def _json_object(fields, entity):
+    return func.json_build_object(*_json_pairs(fields, entity))
+
+
 class ProjectRepository:
     async def create(self, session: AsyncSession, project: Project) -> Project:
         session.add(project)
@@ -25,12 +74,96 @@ class ProjectRepository:
         result = await session.execute(select(Project))
         return result.scalars().all()
 
+    async def get_analysis_json(self, session: AsyncSession, project_id: int) -> Optional[bytes]:
+        """Project -> spaces -> items as one JSON document built by Postgres (json_agg), as raw bytes."""
+        items = (
+            select(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(_json_object(ANALYSIS_ITEM_FIELDS, Item), Item.id)),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .where(Item.space_id == Space.id)
+            .scalar_subquery()
+        )
+        spaces = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            func.json_build_object(*_json_pairs(ANALYSIS_SPACE_FIELDS, Space), literal_column("'items'"), items),
+                            Space.id,
+                        )
+                    ),
+                    literal_column("'[]'::json"),
+                )
+            )
+            .where(Space.project_id == Project.id)
+            .scalar_subquery()
+        )
+        document = func.json_build_object(*_json_pairs(ANALYSIS_PROJECT_FIELDS, Project), literal_column("'spaces'"), spaces)
+        result = await session.execute(select(cast(document, Text)).where(Project.id == project_id))
+        payload = result.scalar_one_or_none()
+        return payload.encode() if payload is not None else None
+
     async def update(self, session: AsyncSession, project: Project) -> Project:
         await session.commit()
         await session.refresh(project)
         logger.info("Project updated", extra={"project_id": project.id})
         return project
 
+    async def get_change_markers(self, session: AsyncSession, project_id: int) -> Optional[Row]:
+        """
+        Cheap change summary for conditional GETs: project version/updated_at plus count, version
+        sum and latest updated_at of its spaces and items (deletes change the counts).
+        """
+        space_ids = select(Space.id).where(Space.project_id == project_id)
+        spaces = (
+            select(func.count(), func.coalesce(func.sum(Space.version), 0), func.max(Space.updated_at))
+            .where(Space.project_id == project_id)
+            .subquery()
+        )
+        items = (
+            select(func.count(), func.coalesce(func.sum(Item.version), 0), func.max(Item.updated_at))
+            .where(Item.space_id.in_(space_ids))
+            .subquery()
+        )
+        result = await session.execute(
+            select(
+                Project.version,
+                Project.updated_at,
+                *(spaces.c[i] for i in range(3)),
+                *(items.c[i] for i in range(3)),
+            )
+            .select_from(Project)
+            .join(spaces, literal_column("true"))
+            .join(items, literal_column("true"))
+            .where(Project.id == project_id)
+        )
+        return result.one_or_none()
+
+    async def get_version(self, session: AsyncSession, project_id: int) -> Optional[int]:
+        result = await session.execute(select(Project.version).where(Project.id == project_id))
+        return result.scalar_one_or_none()
+
+    async def bump_version(self, session: AsyncSession, project_id: int) -> None:
+        """Mark the project as changed (invalidates cached reads); the caller commits."""
+        await session.execute(
+            update(Project)
+            .where(Project.id == project_id)
+            .values(version=Project.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def bump_version_for_space(self, session: AsyncSession, space_id: int) -> None:
+        """bump_version for the project owning the space; the caller commits."""
+        await session.execute(
+            update(Project)
+            .where(Project.id == select(Space.project_id).where(Space.id == space_id).scalar_subquery())
+            .values(version=Project.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
 class SpaceRepository:
     async def create(self, session: AsyncSession, space: Space) -> Space:
         session.add(space)
@@ -39,6 +172,18 @@ class SpaceRepository:
         logger.info("Space created", extra={"space_id": space.id, "project_id": space.project_id})
         return space
 
+    async def create_many(self, session: AsyncSession, spaces: List[Space], commit: bool = True) -> List[int]:
+        """Insert spaces in one batched INSERT ... RETURNING; commit=False leaves the transaction open."""
+        if not spaces:
+            return []
+        session.add_all(spaces)
+        await session.flush()
+        ids = [space.id for space in spaces]
+        if commit:
+            await session.commit()
+        logger.info("Spaces created", extra={"count": len(ids), "project_ids": sorted({s.project_id for s in spaces})})
+        return ids
+
     async def get_by_id(self, session: AsyncSession, space_id: int) -> Optional[Space]:
         result = await session.execute(
             select(Space).filter(Space.id == space_id)
@@ -62,6 +207,18 @@ class ItemRepository:
         )
         return item
 
+    async def create_many(self, session: AsyncSession, items: List[Item], commit: bool = True) -> List[int]:
+        """Insert items in one batched INSERT ... RETURNING; commit=False leaves the transaction open."""
+        if not items:
+            return []
+        session.add_all(items)
+        await session.flush()
+        ids = [item.id for item in items]
+        if commit:
+            await session.commit()
+        logger.info("Items created", extra={"count": len(ids), "space_ids": sorted({i.space_id for i in items})})
+        return ids
+
     async def get_by_id(self, session: AsyncSession, item_id: int) -> Optional[Item]:
         result = await session.execute(
             select(Item).filter(Item.id == item_id)
@@ -74,6 +231,108 @@ class ItemRepository:
         logger.info("Item updated", extra={"item_id": item.id, "space_id": item.space_id})
         return item
 
+    async def stream_accepted(
+        self, session: AsyncSession, project_id: int, batch_size: int = 500
+    ) -> AsyncIterator[Row]:
+        """
+        Accepted items of a project joined with their space, ordered by space then item, read
+        through a server-side cursor. Rows expose space_* columns plus ANALYSIS_ITEM_FIELDS.
+        """
+        stmt = (
+            select(
+                *(getattr(Space, name).label(f"space_{name}") for name in ANALYSIS_SPACE_FIELDS),
+                *(getattr(Item, name) for name in ANALYSIS_ITEM_FIELDS),
+            )
+            .join(Space, Item.space_id == Space.id)
+            .where(Space.project_id == project_id, Item.is_accepted.is_(True))
+            .order_by(Space.id, Item.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream(stmt)
+        async for row in result:
+            yield row
+
+    async def update_many(
+        self, session: AsyncSession, project_id: int, updates: List[Dict[str, Any]], commit: bool = True
+    ) -> Dict[str, List]:
+        """
+        Apply many item edits with UPDATE ... FROM (VALUES ...) in one transaction.
+
+        Each update holds "id", the expected "version" and the fields to set. Rows whose
+        version moved on are reported as conflicts, unknown ids (or ids outside the project) as
+        not_found; everything else is updated and gets version + 1. commit=False leaves the
+        transaction open.
+        """
+        updated: Dict[int, int] = {}
+        project_items = select(Space.id).where(Space.project_id == project_id)
+        for start in range(0, len(updates), REVIEW_VALUES_CHUNK):
+            chunk = updates[start:start + REVIEW_VALUES_CHUNK]
+            columns = [column("id", Integer), column("expected_version", Integer)]
+            for name in REVIEWABLE_FIELDS:
+                columns += [column(f"set_{name}", Boolean), column(name, Item.__table__.c[name].type)]
+            rows = []
+            for change in chunk:
+                row = [change["id"], change["version"]]
+                for name in REVIEWABLE_FIELDS:
+                    row += [name in change, change.get(name)]
+                rows.append(tuple(row))
+            changes = values(*columns, name="changes").data(rows)
+
+            # Casts keep all-NULL VALUES columns (typed as text by Postgres) comparable to item columns
+            assignments = {
+                name: case(
+                    (changes.c[f"set_{name}"], cast(changes.c[name], Item.__table__.c[name].type)),
+                    else_=Item.__table__.c[name],
+                )
+                for name in REVIEWABLE_FIELDS
+            }
+            stmt = (
+                update(Item)
+                .where(
+                    and_(
+                        Item.id == changes.c.id,
+                        Item.space_id.in_(project_items),
+                        Item.version == cast(changes.c.expected_version, Integer),
+                    )
+                )
+                .values(**assignments, version=Item.version + 1)
+                .returning(Item.id, Item.version)
+                .execution_options(synchronize_session=False)
+            )
+            for item_id, version in await session.execute(stmt):
+                updated[item_id] = version
+
+        missing = [change["id"] for change in updates if change["id"] not in updated]
+        current: Dict[int, int] = {}
+        if missing:
+            result = await session.execute(
+                select(Item.id, Item.version).where(Item.id.in_(missing), Item.space_id.in_(project_items))
+            )
+            current = dict(result.all())
+        if commit:
+            await session.commit()
+
+        conflicts = [
+            {"id": change["id"], "expected_version": change["version"], "current_version": current[change["id"]]}
+            for change in updates
+            if change["id"] in current
+        ]
+        not_found = [item_id for item_id in missing if item_id not in current]
+        logger.info(
+            "Items updated in batch",
+            extra={
+                "project_id": project_id,
+                "updated": len(updated),
+                "conflicts": len(conflicts),
+                "not_found": len(not_found),
+            },
+        )
+        return {
+            "updated": [{"id": item_id, "version": version} for item_id, version in updated.items()],
+            "conflicts": conflicts,
+            "not_found": not_found,
+        }
+
 class DocumentRepository:
     async def create(self, session: AsyncSession, document: Document) -> Document:
         session.add(document)
@@ -88,16 +347,64 @@ class DocumentRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_ids(self, session: AsyncSession, document_ids: List[int]) -> List[Document]:
+        result = await session.execute(
+            select(Document).filter(Document.id.in_(document_ids))
+        )
+        return result.scalars().all()
+
     async def get_by_project_id(self, session: AsyncSession, project_id: int) -> List[Document]:
         result = await session.execute(
             select(Document).filter(Document.project_id == project_id)
         )
         return result.scalars().all()
 
+    async def get_by_content_sha256(self, session: AsyncSession, content_sha256: str) -> List[Document]:
+        """Documents with identical bytes, analyzed ones first, then oldest first."""
+        result = await session.execute(
+            select(Document)
+            .filter(Document.content_sha256 == content_sha256)
+            .order_by(Document.project_id.is_(None), Document.id)
+        )
+        return result.scalars().all()
+
     async def get_all(self, session: AsyncSession) -> List[Document]:
         result = await session.execute(select(Document).order_by(Document.upload_date.desc()))
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        analyzed: Optional[bool] = None,
+        filename_prefix: Optional[str] = None,
+        uploaded_from: Optional[datetime] = None,
+        uploaded_to: Optional[datetime] = None,
+    ) -> List[Document]:
+        """
+        Newest-first page of documents using keyset pagination on (upload_date, id).
+
+        `after` is the (upload_date, id) of the last row of the previous page. Fetches up to
+        `limit` rows; callers ask for one extra to learn whether another page exists.
+        """
+        stmt = select(Document)
+        if after is not None:
+            stmt = stmt.where(tuple_(Document.upload_date, Document.id) < tuple_(*after))
+        if analyzed is True:
+            stmt = stmt.where(Document.project_id.is_not(None))
+        elif analyzed is False:
+            stmt = stmt.where(Document.project_id.is_(None))
+        if filename_prefix:
+            stmt = stmt.where(Document.filename.startswith(filename_prefix, autoescape=True))
+        if uploaded_from is not None:
+            stmt = stmt.where(Document.upload_date >= uploaded_from)
+        if uploaded_to is not None:
+            stmt = stmt.where(Document.upload_date < uploaded_to)
+        stmt = stmt.order_by(Document.upload_date.desc(), Document.id.desc()).limit(limit)
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
 # Singleton instances
 project_repository = ProjectRepository()
 space_repository = SpaceRepository()
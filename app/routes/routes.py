@@ -1,19 +1,24 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, field_validator
+from typing import Any, Dict, List, Optional
 
 from fastapi import status
 
-from app.core.db import get_session
+from app.agents.parser import parse_cache
+from app.core.db import db_stats, get_session
+from app.core.llm_cache import llm_cache
+from app.core.rate_limit import llm_rate_limiter
+from app.core.storage import UploadTooLarge, store_upload
 from app.core.logging import get_logger
-from app.services.project_service import project_service
+from app.services.project_service import EXPORT_FORMATS, project_service
+from app.services.analysis_jobs import analysis_job_service, JobQueueFull
 from app.core.auth import create_access_token, verify_credentials, get_current_user
-import shutil
-import os
-import csv
-from io import StringIO
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import json
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -43,6 +48,39 @@ class PromptAddRequest(BaseModel):
     prompt: str
 
 
+class RequirementUpdate(BaseModel):
+    id: int
+    version: int  # expected current version; stale versions come back as conflicts
+    name: Optional[str] = None
+    category: Optional[str] = None
+    technical_specs: Optional[str] = None
+    material_preference: Optional[str] = None
+    color_preference: Optional[str] = None
+    brand_preference: Optional[str] = None
+    special_instruction: Optional[str] = None
+    quantity: Optional[int] = None
+    confidence: Optional[float] = None
+    is_accepted: Optional[bool] = None
+
+    @field_validator("name", "category")
+    @classmethod
+    def required_not_null(cls, value: Optional[str]) -> str:
+        # Only runs for fields that are sent; these columns are NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class BatchReviewRequest(BaseModel):
+    updates: List[RequirementUpdate]
+
+
+class BatchAnalyzeRequest(BaseModel):
+    document_ids: List[int]
+    use_cache: bool = True
+    force: bool = False
+
+
 class LoginRequest(BaseModel):
     username: str
     password: str
@@ -55,6 +93,22 @@ async def login(payload: LoginRequest):
     token = create_access_token(payload.username)
     return {"access_token": token, "token_type": "bearer"}
 
+async def _save_upload(session: AsyncSession, file: UploadFile) -> Dict[str, Any]:
+    """Stream an upload into content-addressed storage and record it, unless identical bytes already were."""
+    stored = await store_upload(file)
+    existing = await project_service.find_duplicate_document(session, stored.sha256)
+    if existing:
+        return {
+            "document_id": existing.id,
+            "filename": file.filename,
+            "duplicate": True,
+            "duplicate_of": {"filename": existing.filename, "project_id": existing.project_id},
+        }
+    document_id = await project_service.upload_document(
+        session, file.filename, stored.path, content_sha256=stored.sha256, size_bytes=stored.size_bytes
+    )
+    return {"document_id": document_id, "filename": file.filename, "duplicate": False}
+
 @router.post("/projects/upload")
 async def upload_rfp(
     file: UploadFile = File(...),
@@ -62,77 +116,259 @@ async def upload_rfp(
     user: str = Depends(get_current_user),
 ):
     """Upload RFP document (does not create project or trigger analysis)"""
-    # Save file temporarily
-    file_path = f"/tmp/{file.filename}"
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        document_id = await project_service.upload_document(session, file.filename, file_path)
-        return {
-            "document_id": document_id,
-            "message": "Document uploaded successfully",
-            "filename": file.filename
-        }
+        result = await _save_upload(session, file)
+        message = "Identical document already uploaded" if result["duplicate"] else "Document uploaded successfully"
+        return {**result, "message": message}
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(exc))
     except Exception as exc:
         logger.exception("File upload failed", extra={"filename": file.filename, "error": str(exc)})
         raise HTTPException(status_code=500, detail="Upload failed")
 
+@router.post("/projects/upload/batch")
+async def upload_rfp_batch(
+    files: List[UploadFile] = File(...),
+    session: AsyncSession = Depends(get_session),
+    user: str = Depends(get_current_user),
+):
+    """Upload a bundle of RFP documents in one request; failures are reported per file."""
+    uploaded = []
+    failed = []
+    for file in files:
+        try:
+            uploaded.append(await _save_upload(session, file))
+        except UploadTooLarge as exc:
+            failed.append({"filename": file.filename, "error": str(exc)})
+        except Exception as exc:
+            logger.exception("File upload failed", extra={"filename": file.filename, "error": str(exc)})
+            failed.append({"filename": file.filename, "error": "Upload failed"})
+    return {"documents": uploaded, "failed": failed}
+
+@router.get("/metrics/parse-cache")
+async def parse_cache_metrics(user: str = Depends(get_current_user)):
+    """Parse cache hit/miss counters and estimated parse time saved."""
+    return parse_cache.stats()
+
+@router.get("/metrics/llm-cache")
+async def llm_cache_metrics(user: str = Depends(get_current_user)):
+    """Per-agent LLM response cache hit/miss counters and latency saved."""
+    return llm_cache.stats()
+
+@router.get("/metrics/analysis-cache")
+async def analysis_cache_metrics(user: str = Depends(get_current_user)):
+    """Hit ratio and memory use of the in-process analysis payload cache."""
+    return project_service.analysis_cache.stats()
+
+@router.get("/metrics/db")
+async def db_metrics(user: str = Depends(get_current_user)):
+    """Connection pool occupancy, checkout wait times and query totals."""
+    return db_stats()
+
+@router.get("/metrics/dedup")
+async def dedup_metrics(user: str = Depends(get_current_user)):
+    """Duplicate uploads detected and LLM analyses avoided by reusing existing projects."""
+    return project_service.dedup_stats()
+
+@router.get("/metrics/llm-rate-limit")
+async def llm_rate_limit_metrics(user: str = Depends(get_current_user)):
+    """Global LLM concurrency and token-bucket state."""
+    return llm_rate_limiter.stats()
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """upload_date is a naive UTC timestamp; convert aware filter values to match."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 @router.get("/documents")
-async def list_documents(session: AsyncSession = Depends(get_session)):
-    """List all uploaded documents"""
-    documents = await project_service.get_all_documents(session)
-    return {"documents": documents}
+async def list_documents(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    analyzed: Optional[bool] = None,
+    filename_prefix: Optional[str] = None,
+    uploaded_from: Optional[datetime] = None,
+    uploaded_to: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """List uploaded documents, newest first; pass next_cursor back as cursor for the next page"""
+    try:
+        return await project_service.list_documents(
+            session,
+            limit,
+            cursor=cursor,
+            analyzed=analyzed,
+            filename_prefix=filename_prefix,
+            uploaded_from=_naive_utc(uploaded_from),
+            uploaded_to=_naive_utc(uploaded_to),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored on both sides and "*" matches anything."""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or _opaque_tag(etag) in [_opaque_tag(tag) for tag in candidates]
+
+def _not_modified(request: Request, validators: Dict[str, Any]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators["etag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second precision
+        last_modified = validators["last_modified"].replace(microsecond=0, tzinfo=timezone.utc)
+        return since.tzinfo is not None and last_modified <= since
+    return False
+
+def _validator_headers(validators: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "ETag": validators["etag"],
+        "Last-Modified": format_datetime(validators["last_modified"].replace(tzinfo=timezone.utc), usegmt=True),
+        # Always revalidate; unchanged projects cost one aggregate query and a 304
+        "Cache-Control": "private, no-cache",
+    }
 
 @router.get("/projects/{id}")
 async def get_project(
     id: int,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     user: str = Depends(get_current_user),
 ):
     """Get project details"""
+    validators = await project_service.get_project_validators(session, id)
+    if not validators:
+        raise HTTPException(status_code=404, detail="Project not found")
+    headers = _validator_headers(validators)
+    if _not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     project = await project_service.get_project(session, id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    return {
-        "id": project.id,
-        "name": project.name,
-        "client_type": project.client_type,
-        "location": project.location,
-        "timeline": project.timeline,
-        "budget_range": project.budget_range,
-        "created_at": project.created_at
-    }
+    return JSONResponse(
+        content=jsonable_encoder({
+            "id": project.id,
+            "name": project.name,
+            "client_type": project.client_type,
+            "location": project.location,
+            "timeline": project.timeline,
+            "budget_range": project.budget_range,
+            "created_at": project.created_at
+        }),
+        headers=headers,
+    )
 
 @router.get("/projects/{id}/analysis")
 async def get_analysis(
     id: int,
+    request: Request,
     session: AsyncSession = Depends(get_session),
     user: str = Depends(get_current_user),
 ):
-    """Get extraction results"""
-    analysis = await project_service.get_project_analysis(session, id)
-    if not analysis:
+    """Get extraction results; supports If-None-Match / If-Modified-Since"""
+    validators = await project_service.get_project_validators(session, id)
+    if not validators:
         raise HTTPException(status_code=404, detail="Project not found")
-    return analysis
+    headers = _validator_headers(validators)
+    if _not_modified(request, validators):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-@router.post("/documents/{document_id}/analyze")
+    payload = await project_service.get_project_analysis_payload(session, id, version=validators["version"])
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+@router.post("/documents/{document_id}/analyze", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_analysis(
     document_id: int,
+    request: Request,
+    use_cache: bool = True,
+    force: bool = False,
     session: AsyncSession = Depends(get_session),
     user: str = Depends(get_current_user),
 ):
-    """Trigger analysis for uploaded document - creates project"""
+    """Queue analysis for an uploaded document; poll /jobs/{job_id} or stream /jobs/{job_id}/events.
+
+    Unless force=true, a document without a project whose identical content was analyzed under
+    another document is linked to that project without calling the LLM.
+    """
+    document = await project_service.document_repository.get_by_id(session, document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
     try:
-        result = await project_service.analyze_document(session, document_id)
-        return {"message": "Analysis complete", "data": result}
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.exception("Analysis endpoint failed", extra={"document_id": document_id, "error": str(e)})
-        raise HTTPException(status_code=500, detail="Analysis failed")
+        job = analysis_job_service.submit(document_id, use_cache=use_cache, force=force)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Analysis queue is full, retry later")
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Analysis queued", "job_id": job.id, "status": job.status, "document_id": document_id},
+        headers={"Location": str(request.url_for("get_job", job_id=job.id))},
+    )
+
+@router.post("/batches/analyze", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_batch_analysis(
+    payload: BatchAnalyzeRequest,
+    session: AsyncSession = Depends(get_session),
+    user: str = Depends(get_current_user),
+):
+    """Queue analysis for many documents; LLM calls share the global rate limiter."""
+    requested = list(dict.fromkeys(payload.document_ids))
+    found = {doc.id for doc in await project_service.document_repository.get_by_ids(session, requested)}
+    try:
+        batch = analysis_job_service.submit_batch(
+            [doc_id for doc_id in requested if doc_id in found],
+            [doc_id for doc_id in requested if doc_id not in found],
+            use_cache=payload.use_cache,
+            force=payload.force,
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Analysis queue cannot hold this batch, retry later")
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=batch.to_dict())
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str, user: str = Depends(get_current_user)):
+    """Per-document status for a bulk analysis."""
+    batch = analysis_job_service.get_batch(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.to_dict()
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user: str = Depends(get_current_user)):
+    """Analysis job status with per-stage timings."""
+    job = analysis_job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, user: str = Depends(get_current_user)):
+    """Server-Sent Events stream of stage transitions; closes when the job finishes."""
+    job = analysis_job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for event in analysis_job_service.events(job):
+            yield f"event: stage\ndata: {json.dumps(event)}\n\n"
+        yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.patch("/projects/{id}/requirements/{req_id}")
 async def update_requirement(
@@ -158,8 +394,30 @@ async def update_requirement(
         "special_instruction": item.special_instruction,
         "quantity": item.quantity,
         "is_accepted": item.is_accepted,
+        "version": item.version,
     }
 
+@router.patch("/projects/{id}/requirements")
+async def review_requirements(
+    id: int,
+    payload: BatchReviewRequest,
+    session: AsyncSession = Depends(get_session),
+    user: str = Depends(get_current_user),
+):
+    """Batch HITL review: field edits and accept/reject for many items in one transaction.
+
+    Only fields present in each update are written. Items whose version no longer matches
+    are returned under "conflicts" with their current version and left untouched.
+    """
+    ids = [update.id for update in payload.updates]
+    if len(ids) != len(set(ids)):
+        raise HTTPException(status_code=400, detail="Each requirement may appear only once per batch")
+    updates = [update.model_dump(exclude_unset=True) | {"id": update.id} for update in payload.updates]
+    result = await project_service.review_requirements(session, id, updates)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return result
+
 @router.post("/projects/{id}/requirements")
 async def add_requirement(
     id: int,
@@ -214,12 +472,13 @@ async def add_item_to_space(
 async def prompt_add(
     id: int,
     payload: PromptAddRequest,
+    use_cache: bool = True,
     session: AsyncSession = Depends(get_session),
     user: str = Depends(get_current_user),
 ):
     """Add spaces/items via a natural-language prompt."""
     try:
-        result = await project_service.prompt_add(session, id, payload.prompt)
+        result = await project_service.prompt_add(session, id, payload.prompt, use_cache=use_cache)
         if result.get("error"):
             raise HTTPException(status_code=404, detail=result["error"])
         return result
@@ -236,20 +495,14 @@ async def export_requirements(
     session: AsyncSession = Depends(get_session),
     user: str = Depends(get_current_user),
 ):
-    """Export requirements (JSON/CSV)"""
-    data = await project_service.export_requirements(session, id, format)
-    
-    if not data:
+    """Export accepted requirements, streamed as JSON, NDJSON or CSV"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}")
+    if not await project_service.get_project(session, id):
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    if format == "csv":
-        output = StringIO()
-        if data:
-            writer = csv.DictWriter(output, fieldnames=data[0].keys())
-            writer.writeheader()
-            writer.writerows(data)
-            csv_content = output.getvalue()
-            return JSONResponse(content={"csv": csv_content})
-        return JSONResponse(content={"csv": ""})
-    
-    return data
+
+    return StreamingResponse(
+        project_service.export_requirements(id, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="project_{id}_export.{format}"'},
+    )
@@ -0,0 +1,211 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.logging import get_logger
+from app.services.project_service import project_service
+
+logger = get_logger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the analysis queue is at ANALYSIS_QUEUE_MAX."""
+
+
+@dataclass
+class AnalysisJob:
+    id: str
+    document_id: int
+    use_cache: bool = True
+    force: bool = False
+    status: str = "queued"  # queued | running | succeeded | failed
+    project_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def record(self, stage: str, **extra: Any) -> None:
+        now = time.time()
+        previous = self.events[-1]["at"] if self.events else self.created_at
+        self.events.append(
+            {
+                "stage": stage,
+                "at": now,
+                "stage_ms": round((now - previous) * 1000, 1),
+                "elapsed_ms": round((now - self.created_at) * 1000, 1),
+                **extra,
+            }
+        )
+        # Wake current listeners; later waiters pick up the fresh event.
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "document_id": self.document_id,
+            "status": self.status,
+            "project_id": self.project_id,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stages": self.events,
+        }
+
+
+@dataclass
+class AnalysisBatch:
+    id: str
+    jobs: List[AnalysisJob]
+    missing_document_ids: List[int] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        finished = [job.finished_at for job in self.jobs if job.finished_at]
+        done = all(job.done for job in self.jobs)
+        return {
+            "batch_id": self.id,
+            "status": "completed" if done else "running",
+            "counts": counts,
+            "elapsed_seconds": round(((max(finished) if done and finished else time.time()) - self.created_at), 3),
+            "documents": [
+                {
+                    "document_id": job.document_id,
+                    "job_id": job.id,
+                    "status": job.status,
+                    "project_id": job.project_id,
+                    "error": job.error,
+                }
+                for job in self.jobs
+            ]
+            + [{"document_id": doc_id, "status": "not_found"} for doc_id in self.missing_document_ids],
+        }
+
+
+class AnalysisJobService:
+    """In-process asyncio worker pool running document analyses in the background."""
+
+    def __init__(self):
+        self.jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self.batches: "OrderedDict[str, AnalysisBatch]" = OrderedDict()
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+
+    async def start(self, workers: Optional[int] = None) -> None:
+        if self.workers:
+            return
+        self.queue = asyncio.Queue(maxsize=settings.ANALYSIS_QUEUE_MAX)
+        count = workers if workers is not None else settings.ANALYSIS_WORKERS
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(max(1, count))]
+        logger.info("Analysis workers started", extra={"workers": len(self.workers)})
+
+    async def stop(self) -> None:
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def submit(self, document_id: int, use_cache: bool = True, force: bool = False) -> AnalysisJob:
+        if self.queue is None:
+            raise RuntimeError("Analysis workers are not running")
+        job = AnalysisJob(id=uuid.uuid4().hex, document_id=document_id, use_cache=use_cache, force=force)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("Analysis queue is full")
+        self.jobs[job.id] = job
+        self._prune()
+        job.record("queued")
+        logger.info("Analysis job queued", extra={"job_id": job.id, "document_id": document_id})
+        return job
+
+    def submit_batch(
+        self,
+        document_ids: List[int],
+        missing_document_ids: List[int],
+        use_cache: bool = True,
+        force: bool = False,
+    ) -> AnalysisBatch:
+        """Queue one job per document; all-or-nothing with respect to queue capacity."""
+        if self.queue is None:
+            raise RuntimeError("Analysis workers are not running")
+        if self.queue.maxsize and self.queue.qsize() + len(document_ids) > self.queue.maxsize:
+            raise JobQueueFull("Analysis queue cannot hold this batch")
+        jobs = [self.submit(document_id, use_cache=use_cache, force=force) for document_id in document_ids]
+        batch = AnalysisBatch(id=uuid.uuid4().hex, jobs=jobs, missing_document_ids=missing_document_ids)
+        self.batches[batch.id] = batch
+        while len(self.batches) > settings.ANALYSIS_JOB_RETENTION:
+            self.batches.popitem(last=False)
+        logger.info("Analysis batch queued", extra={"batch_id": batch.id, "documents": len(jobs)})
+        return batch
+
+    def get_batch(self, batch_id: str) -> Optional[AnalysisBatch]:
+        return self.batches.get(batch_id)
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        return self.jobs.get(job_id)
+
+    async def events(self, job: AnalysisJob) -> AsyncIterator[Dict[str, Any]]:
+        """Yield recorded stage events, then new ones as they happen, until the job finishes."""
+        sent = 0
+        while True:
+            updated = job.updated
+            while sent < len(job.events):
+                yield job.events[sent]
+                sent += 1
+            if job.done:
+                return
+            await updated.wait()
+
+    def _prune(self) -> None:
+        while len(self.jobs) > settings.ANALYSIS_JOB_RETENTION:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if not oldest.done:
+                break
+            del self.jobs[oldest_id]
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: AnalysisJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.record("started")
+        try:
+            async with AsyncSessionLocal() as session:
+                job.project_id = await project_service.analyze_document(
+                    session, job.document_id, use_cache=job.use_cache, on_stage=job.record, force=job.force
+                )
+            job.status = "succeeded"
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc) or exc.__class__.__name__
+            logger.exception("Analysis job failed", extra={"job_id": job.id, "document_id": job.document_id})
+        finally:
+            job.finished_at = time.time()
+            job.record(job.status, project_id=job.project_id, error=job.error)
+
+
+# Singleton instance shared by routes and app lifespan
+analysis_job_service = AnalysisJobService()
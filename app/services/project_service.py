@@ -1,9 +1,21 @@
+import base64
+import csv
+import hashlib
+import json
+from datetime import datetime
+from io import StringIO
+
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator, Tuple
 
 from app.repositories.project_repository import (
+    ANALYSIS_ITEM_FIELDS,
+    ANALYSIS_PROJECT_FIELDS,
+    ANALYSIS_SPACE_FIELDS,
+    REVIEWABLE_FIELDS,
     project_repository,
     space_repository,
     item_repository,
@@ -11,11 +23,44 @@ from app.repositories.project_repository import (
 )
 from app.agents.orchestrator import OrchestratorAgent
 from app.agents.prompt_add import PromptAddAgent
+from app.agents.reducer import category_value
 from app.entities.entities import Project, Space, Item, Document
+from app.core.cache import VersionedLRUCache
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+EXPORT_FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+CSV_EXPORT_COLUMNS = [
+    "project_name",
+    "space",
+    "item_name",
+    "category",
+    "technical_specs",
+    "material",
+    "color",
+    "brand",
+    "quantity",
+]
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+
+def encode_cursor(upload_date: datetime, document_id: int) -> str:
+    """Opaque page token holding the (upload_date, id) keyset position."""
+    raw = json.dumps([upload_date.isoformat(), document_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        upload_date, document_id = json.loads(raw)
+        return datetime.fromisoformat(upload_date), int(document_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
 class ProjectService:
     """Stateless service for project operations"""
     
@@ -25,18 +70,54 @@ class ProjectService:
         self.item_repository = item_repository
         self.document_repository = document_repository
         self.prompt_add_agent = PromptAddAgent()
+        self.analysis_cache = VersionedLRUCache(settings.ANALYSIS_CACHE_MAX_ENTRIES, settings.ANALYSIS_CACHE_MAX_BYTES)
+        self._dedup_counts = {
+            "uploads_deduplicated": 0,
+            # Duplicate uploads answered with an already analyzed document: no analysis needed
+            "uploads_reusing_analysis": 0,
+            "analyses_reused": 0,
+            "analyses_run": 0,
+            "analyses_forced": 0,
+        }
     
-    async def upload_document(self, session: AsyncSession, filename: str, file_path: str) -> int:
+    async def upload_document(
+        self,
+        session: AsyncSession,
+        filename: str,
+        file_path: str,
+        content_sha256: Optional[str] = None,
+        size_bytes: Optional[int] = None,
+    ) -> int:
         """Upload document without creating project"""
         document = Document(
             filename=filename,
             file_path=file_path,
+            content_sha256=content_sha256,
+            size_bytes=size_bytes,
             project_id=None  # No project yet
         )
         document = await self.document_repository.create(session, document)
         logger.info("Document upload recorded", extra={"document_id": document.id, "filename": filename})
         return document.id
 
+    async def find_duplicate_document(self, session: AsyncSession, content_sha256: str) -> Optional[Document]:
+        """Existing document with identical bytes (preferring an analyzed one), if any."""
+        matches = await self.document_repository.get_by_content_sha256(session, content_sha256)
+        if not matches:
+            return None
+        self._dedup_counts["uploads_deduplicated"] += 1
+        if matches[0].project_id is not None:
+            self._dedup_counts["uploads_reusing_analysis"] += 1
+        logger.info(
+            "Duplicate upload detected",
+            extra={"document_id": matches[0].id, "sha256": content_sha256},
+        )
+        return matches[0]
+
+    def dedup_stats(self) -> Dict[str, int]:
+        avoided = self._dedup_counts["uploads_reusing_analysis"] + self._dedup_counts["analyses_reused"]
+        return {**self._dedup_counts, "llm_runs_avoided": avoided}
+
     async def add_space_with_items(self, session: AsyncSession, project_id: int, space_data: Dict[str, Any]) -> Optional[Space]:
         """Add a new space (optionally with items) to a project."""
         project = await self.project_repository.get_by_id(session, project_id)
@@ -48,14 +129,10 @@ class ProjectService:
             room_type=space_data["room_type"],
             dimension=space_data.get("dimension"),
             area=space_data.get("area"),
+            source="manual",
         )
-        space = await self.space_repository.create(session, space)
-
-        items_data = space_data.get("items") or []
-        created_items = []
-        for item in items_data:
-            new_item = Item(
-                space_id=space.id,
+        items = [
+            Item(
                 name=item.get("name") or item.get("category") or "Item",
                 category=item.get("category") or "Others",
                 technical_specs=item.get("technical_specs"),
@@ -65,12 +142,24 @@ class ProjectService:
                 special_instruction=item.get("special_instruction"),
                 quantity=item.get("quantity"),
                 confidence=item.get("confidence"),
+                source="manual",
             )
-            created_items.append(await self.item_repository.create(session, new_item))
+            for item in space_data.get("items") or []
+        ]
+        try:
+            await self.space_repository.create_many(session, [space], commit=False)
+            for item in items:
+                item.space_id = space.id
+            await self.item_repository.create_many(session, items, commit=False)
+            await self.project_repository.bump_version(session, project_id)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
 
         logger.info(
             "Space added with items",
-            extra={"project_id": project_id, "space_id": space.id, "item_count": len(created_items)},
+            extra={"project_id": project_id, "space_id": space.id, "item_count": len(items)},
         )
         return space
 
@@ -92,29 +181,57 @@ class ProjectService:
             quantity=item_data.get("quantity"),
             confidence=item_data.get("confidence"),
             is_accepted=item_data.get("is_accepted"),
+            source="manual",
         )
+        await self.project_repository.bump_version(session, space.project_id)
         created = await self.item_repository.create(session, item)
         logger.info("Item added to space", extra={"space_id": space_id, "item_id": created.id})
         return created
 
-    async def analyze_document(self, session: AsyncSession, document_id: int) -> Dict[str, Any]:
-        """Analyze document and create project"""
-        # Get the document
-        documents = await self.document_repository.get_by_id(session, document_id)
-        if not documents:
+    async def analyze_document(
+        self,
+        session: AsyncSession,
+        document_id: int,
+        use_cache: bool = True,
+        on_stage: Optional[Callable[[str], None]] = None,
+        force: bool = False,
+    ) -> int:
+        """Analyze document and create or update its project; returns the project id.
+
+        Without force, a not yet analyzed document whose identical content was analyzed under
+        another document is linked to that project and the LLM pipeline is skipped. Re-analyzing
+        a document that already has a project always runs the pipeline.
+        """
+        document = await self.document_repository.get_by_id(session, document_id)
+        if not document:
             raise ValueError(f"Document {document_id} not found")
-        document = documents[0] if isinstance(documents, list) else documents
+
+        if not force:
+            project_id = await self._reusable_project_id(session, document)
+            if project_id is not None:
+                document.project_id = project_id
+                await session.commit()
+                self._dedup_counts["analyses_reused"] += 1
+                logger.info("Analysis reused", extra={"document_id": document_id, "project_id": project_id})
+                if on_stage:
+                    on_stage("reused")
+                return project_id
+        else:
+            self._dedup_counts["analyses_forced"] += 1
+        self._dedup_counts["analyses_run"] += 1
 
         logger.info("Starting document analysis", extra={"document_id": document_id})
 
         try:
             orchestrator = OrchestratorAgent(session)
-            project_id = await orchestrator.create_or_update_project_from_document(document)
+            project_id = await orchestrator.create_or_update_project_from_document(
+                document, use_cache=use_cache, on_stage=on_stage
+            )
             logger.info(
                 "Document analysis complete",
                 extra={"document_id": document_id, "project_id": project_id},
             )
-            return await self.get_project_analysis(session, project_id)
+            return project_id
         except Exception as exc:
             logger.exception(
                 "Document analysis failed",
@@ -122,21 +239,51 @@ class ProjectService:
             )
             raise
 
-    async def get_all_documents(self, session: AsyncSession) -> List[Dict[str, Any]]:
-        """Get all uploaded documents"""
-        documents = await self.document_repository.get_all(session)
-        logger.info("Documents fetched", extra={"count": len(documents)})
-        return [
-            {
-                "id": doc.id,
-                "filename": doc.filename,
-                "upload_date": doc.upload_date,
-                "project_id": doc.project_id,
-                "has_analysis": doc.project_id is not None
-            }
-            for doc in documents
-        ]
+    async def _reusable_project_id(self, session: AsyncSession, document: Document) -> Optional[int]:
+        """Project of another document with identical bytes, for documents not analyzed yet."""
+        if document.project_id is not None or not document.content_sha256:
+            return None
+        for sibling in await self.document_repository.get_by_content_sha256(session, document.content_sha256):
+            if sibling.id != document.id and sibling.project_id is not None:
+                return sibling.project_id
+        return None
 
+    async def list_documents(
+        self,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        analyzed: Optional[bool] = None,
+        filename_prefix: Optional[str] = None,
+        uploaded_from: Optional[datetime] = None,
+        uploaded_to: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """One page of uploaded documents, newest first; raises ValueError for a malformed cursor."""
+        documents = await self.document_repository.get_page(
+            session,
+            limit + 1,
+            after=decode_cursor(cursor) if cursor else None,
+            analyzed=analyzed,
+            filename_prefix=filename_prefix,
+            uploaded_from=uploaded_from,
+            uploaded_to=uploaded_to,
+        )
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        logger.info("Documents fetched", extra={"count": len(documents), "has_more": has_more})
+        return {
+            "documents": [
+                {
+                    "id": doc.id,
+                    "filename": doc.filename,
+                    "upload_date": doc.upload_date,
+                    "project_id": doc.project_id,
+                    "has_analysis": doc.project_id is not None
+                }
+                for doc in documents
+            ],
+            "next_cursor": encode_cursor(documents[-1].upload_date, documents[-1].id) if has_more else None,
+        }
 
     async def get_project(self, session: AsyncSession, project_id: int) -> Optional[Project]:
         """Get project by ID"""
@@ -192,6 +339,7 @@ class ProjectService:
                     "quantity": item.quantity,
                     "confidence": item.confidence,
                     "is_accepted": item.is_accepted,
+                    "version": item.version,
                 }
                 space_dict["items"].append(item_dict)
             result_dict["spaces"].append(space_dict)
@@ -199,6 +347,54 @@ class ProjectService:
         logger.info("Project analysis fetched", extra={"project_id": project_id})
         return result_dict
 
+    async def get_project_analysis_json(self, session: AsyncSession, project_id: int) -> Optional[bytes]:
+        """Same payload as get_project_analysis, serialized by Postgres in a single query."""
+        payload = await self.project_repository.get_analysis_json(session, project_id)
+        if payload is None:
+            return None
+        logger.info("Project analysis fetched", extra={"project_id": project_id, "bytes": len(payload)})
+        return payload
+
+    async def get_project_validators(self, session: AsyncSession, project_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Weak ETag and Last-Modified for a project's reads.
+
+        The ETag hashes version/updated_at of the project, its spaces and items. It is weak
+        because gzip and identity responses share it. Last-Modified is the project's
+        updated_at, which every write (deletes included) advances with the version bump.
+        """
+        markers = await self.project_repository.get_change_markers(session, project_id)
+        if markers is None:
+            return None
+        digest = hashlib.sha256(repr(tuple(markers)).encode()).hexdigest()[:32]
+        return {"etag": f'W/"{project_id}-{digest}"', "last_modified": markers[1], "version": markers[0]}
+
+    async def get_project_analysis_payload(
+        self, session: AsyncSession, project_id: int, version: Optional[int] = None
+    ) -> Optional[bytes]:
+        """Serialized analysis, served from the in-process cache while projects.version is unchanged.
+
+        Pass version when the caller already read projects.version, saving the lookup.
+        """
+        if version is None:
+            version = await self.project_repository.get_version(session, project_id)
+        if version is None:
+            return None
+        if settings.ANALYSIS_CACHE_ENABLED:
+            cached = self.analysis_cache.get(project_id, version)
+            if cached is not None:
+                return cached
+
+        if settings.ANALYSIS_JSON_AGGREGATION:
+            payload = await self.get_project_analysis_json(session, project_id)
+        else:
+            analysis = await self.get_project_analysis(session, project_id)
+            payload = json.dumps(jsonable_encoder(analysis)).encode() if analysis else None
+        if payload is not None and settings.ANALYSIS_CACHE_ENABLED:
+            # Keyed by the version read above; a concurrent write only makes this entry unreachable
+            self.analysis_cache.set(project_id, version, payload)
+        return payload
+
     async def update_requirement(self, session: AsyncSession, item_id: int, updates: Dict[str, Any]) -> Optional[Item]:
         """Update a requirement (item)"""
         item = await self.item_repository.get_by_id(session, item_id)
@@ -206,14 +402,37 @@ class ProjectService:
             return None
 
         for key, value in updates.items():
-            if hasattr(item, key):
+            if key in REVIEWABLE_FIELDS:
                 setattr(item, key, value)
+        item.version = (item.version or 1) + 1
+        await self.project_repository.bump_version_for_space(session, item.space_id)
 
         updated = await self.item_repository.update(session, item)
         logger.info("Requirement updated", extra={"item_id": item_id, "project_id": id})
         return updated
 
-    async def prompt_add(self, session: AsyncSession, project_id: int, prompt: str) -> Dict[str, Any]:
+    async def review_requirements(
+        self, session: AsyncSession, project_id: int, updates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Apply a batch of HITL edits in one transaction; stale versions come back as conflicts."""
+        project = await self.project_repository.get_by_id(session, project_id)
+        if not project:
+            return None
+        try:
+            result = await self.item_repository.update_many(session, project_id, updates, commit=False)
+            if result["updated"]:
+                await self.project_repository.bump_version(session, project_id)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        logger.info(
+            "Requirements reviewed in batch",
+            extra={"project_id": project_id, "requested": len(updates), "updated": len(result["updated"])},
+        )
+        return result
+
+    async def prompt_add(self, session: AsyncSession, project_id: int, prompt: str, use_cache: bool = True) -> Dict[str, Any]:
         """Use a prompt to add spaces/items to an existing project."""
         project = await session.execute(
             select(Project)
@@ -231,43 +450,56 @@ class ProjectService:
             summaries.append(f"{space.room_type}: {item_summaries}")
         context_summary = "; ".join(summaries) if summaries else "No spaces yet."
 
-        additions = await self.prompt_add_agent.generate_additions(context_summary, prompt)
+        additions = await self.prompt_add_agent.generate_additions(context_summary, prompt, use_cache=use_cache)
 
-        # Apply additions
-        created_spaces = []
-        created_items = []
+        # Apply additions: resolve spaces first (new ones in one insert), then all items in one insert
+        spaces_by_type = {space.room_type.lower(): space for space in project_entity.spaces}
+        new_spaces = []
+        targets = []
         for space_add in additions:
             # match by room_type (case-insensitive)
-            existing_space = next(
-                (s for s in project_entity.spaces if s.room_type.lower() == (space_add.room_type or "").lower()),
-                None,
-            )
-            if existing_space is None:
-                new_space = Space(
+            key = (space_add.room_type or "").lower()
+            space = spaces_by_type.get(key)
+            if space is None:
+                space = Space(
                     project_id=project_id,
                     room_type=space_add.room_type,
                     dimension=space_add.dimension,
                     area=space_add.area,
+                    source="manual",
                 )
-                existing_space = await self.space_repository.create(session, new_space)
-                project_entity.spaces.append(existing_space)
-                created_spaces.append(existing_space.id)
-
-            for item_add in space_add.items:
-                item = Item(
-                    space_id=existing_space.id,
-                    name=item_add.name or item_add.category.value if hasattr(item_add.category, "value") else item_add.category,
-                    category=item_add.category.value if hasattr(item_add.category, "value") else item_add.category,
-                    technical_specs=item_add.technical_specs,
-                    material_preference=item_add.material_preference,
-                    color_preference=item_add.color_preference,
-                    brand_preference=item_add.brand_preference,
-                    special_instruction=item_add.special_instruction,
-                    quantity=item_add.quantity,
-                    confidence=item_add.confidence,
-                )
-                created_item = await self.item_repository.create(session, item)
-                created_items.append(created_item.id)
+                spaces_by_type[key] = space
+                new_spaces.append(space)
+            targets.append((space, space_add))
+
+        try:
+            created_spaces = await self.space_repository.create_many(session, new_spaces, commit=False)
+            items = []
+            for space, space_add in targets:
+                for item_add in space_add.items:
+                    category = category_value(item_add.category)
+                    items.append(
+                        Item(
+                            space_id=space.id,
+                            name=item_add.name or category,
+                            category=category,
+                            technical_specs=item_add.technical_specs,
+                            material_preference=item_add.material_preference,
+                            color_preference=item_add.color_preference,
+                            brand_preference=item_add.brand_preference,
+                            special_instruction=item_add.special_instruction,
+                            quantity=item_add.quantity,
+                            confidence=item_add.confidence,
+                            source="manual",
+                        )
+                    )
+            created_items = await self.item_repository.create_many(session, items, commit=False)
+            if created_spaces or created_items:
+                await self.project_repository.bump_version(session, project_id)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
 
         logger.info(
             "Prompt-based additions applied",
@@ -284,40 +516,87 @@ class ProjectService:
             "created_items": created_items,
         }
 
-    async def export_requirements(self, session: AsyncSession, project_id: int, format: str = "json") -> Any:
-        """Export requirements in specified format"""
-        analysis = await self.get_project_analysis(session, project_id)
-        if not analysis:
-            return None
-
-        if format == "json":
-            filtered_spaces = []
-            for space in analysis.get("spaces", []):
-                filtered_items = [i for i in space.get("items", []) if i.get("is_accepted") is True]
-                if filtered_items:
-                    filtered_spaces.append({**space, "items": filtered_items})
-            logger.info("Exported requirements (json)", extra={"project_id": project_id})
-            return {**analysis, "spaces": filtered_spaces}
-        elif format == "csv":
-            rows = []
-            for space in analysis.get("spaces", []):
-                for item in space.get("items", []):
-                    if item.get("is_accepted") is not True:
-                        continue
-                    rows.append({
-                        "project_name": analysis["name"],
-                        "space": space["room_type"],
-                        "item_name": item["name"],
-                        "category": item["category"],
-                        "technical_specs": item.get("technical_specs", ""),
-                        "material": item.get("material_preference", ""),
-                        "color": item.get("color_preference", ""),
-                        "brand": item.get("brand_preference", ""),
-                        "quantity": item.get("quantity", "")
-                    })
-            logger.info("Exported requirements (csv)", extra={"project_id": project_id, "rows": len(rows)})
-            return rows
-        return None
+    async def export_requirements(self, project_id: int, format: str = "json") -> AsyncIterator[str]:
+        """
+        Stream accepted requirements as text chunks in EXPORT_FORMATS.
+
+        Opens its own session so the stream can outlive the request handler; rows are filtered
+        in SQL and read through a server-side cursor, so memory stays flat with project size.
+        """
+        async with AsyncSessionLocal() as session:
+            project = await self.project_repository.get_by_id(session, project_id)
+            if project is None:
+                return
+            rows = self.item_repository.stream_accepted(session, project_id, settings.EXPORT_BATCH_SIZE)
+            if format == "csv":
+                chunks = self._export_csv(project, rows)
+            elif format == "ndjson":
+                chunks = self._export_ndjson(rows)
+            else:
+                chunks = self._export_json(project, rows)
+
+            count = 0
+            buffer: List[str] = []
+            size = 0
+            async for chunk, is_row in chunks:
+                count += is_row
+                buffer.append(chunk)
+                size += len(chunk)
+                # Header goes out immediately; rows are coalesced into ~64 KB writes
+                if not is_row or size >= EXPORT_CHUNK_CHARS:
+                    yield "".join(buffer)
+                    buffer, size = [], 0
+            if buffer:
+                yield "".join(buffer)
+        logger.info("Exported requirements", extra={"project_id": project_id, "format": format, "rows": count})
+
+    async def _export_csv(self, project: Project, rows) -> AsyncIterator[Tuple[str, bool]]:
+        out = StringIO()
+        writer = csv.writer(out)
+
+        def line(values) -> str:
+            out.seek(0)
+            out.truncate()
+            writer.writerow(values)
+            return out.getvalue()
+
+        yield line(CSV_EXPORT_COLUMNS), False
+        async for row in rows:
+            yield line(
+                [
+                    project.name,
+                    row.space_room_type,
+                    row.name,
+                    row.category,
+                    row.technical_specs,
+                    row.material_preference,
+                    row.color_preference,
+                    row.brand_preference,
+                    row.quantity,
+                ]
+            ), True
+
+    async def _export_ndjson(self, rows) -> AsyncIterator[Tuple[str, bool]]:
+        async for row in rows:
+            record = {f"space_{name}": getattr(row, f"space_{name}") for name in ANALYSIS_SPACE_FIELDS}
+            record.update({name: getattr(row, name) for name in ANALYSIS_ITEM_FIELDS})
+            yield json.dumps(record) + "\n", True
+
+    async def _export_json(self, project: Project, rows) -> AsyncIterator[Tuple[str, bool]]:
+        """Same document shape as the analysis payload, limited to spaces with accepted items."""
+        header = jsonable_encoder({name: getattr(project, name) for name in ANALYSIS_PROJECT_FIELDS})
+        yield json.dumps(header)[:-1] + ', "spaces": [', False
+        space_id = None
+        async for row in rows:
+            item = json.dumps({name: getattr(row, name) for name in ANALYSIS_ITEM_FIELDS})
+            if row.space_id == space_id:
+                yield ", " + item, True
+                continue
+            space = {name: getattr(row, f"space_{name}") for name in ANALYSIS_SPACE_FIELDS}
+            prefix = "" if space_id is None else "]}, "
+            space_id = row.space_id
+            yield prefix + json.dumps(space)[:-1] + ', "items": [' + item, True
+        yield ("]}" if space_id is not None else "") + "]}", False
 
 # Singleton instance with injected repositories
 project_service = ProjectService()
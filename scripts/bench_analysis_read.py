@@ -0,0 +1,131 @@
+"""
+Benchmark the ORM analysis read path against the Postgres JSON-aggregation path.
+
+Seeds a scratch project (20 items per space) in the configured DATABASE_URL for each size,
+then measures building and serializing GET /projects/{id}/analysis both ways: ORM
+(selectinload + dicts + FastAPI JSON encoding) and json_agg (raw bytes from one query).
+Reports median latency and peak traced memory, then deletes the scratch data.
+
+Usage: python scripts/bench_analysis_read.py [--items 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import delete, select  # noqa: E402
+
+from app.core.db import AsyncSessionLocal, engine  # noqa: E402
+from app.entities.entities import Item, Project, Space  # noqa: E402
+from app.repositories.project_repository import item_repository, project_repository, space_repository  # noqa: E402
+from app.services.project_service import project_service  # noqa: E402
+
+ITEMS_PER_SPACE = 20
+
+
+async def seed(session, total_items: int) -> int:
+    project = await project_repository.create(session, Project(name=f"analysis-read benchmark {total_items}"))
+    spaces = [
+        Space(project_id=project.id, room_type=f"Room {i}", dimension="4m x 5m", area="20 sqm")
+        for i in range(max(1, total_items // ITEMS_PER_SPACE))
+    ]
+    space_ids = await space_repository.create_many(session, spaces)
+    items = [
+        Item(
+            space_id=space_ids[i % len(space_ids)],
+            name=f"Item {i}",
+            category="Furniture",
+            technical_specs="Solid oak frame, 1200 x 600 mm, load rated 150 kg",
+            material_preference="Oak",
+            color_preference="Natural",
+            quantity=i % 7 + 1,
+            confidence=0.8,
+        )
+        for i in range(total_items)
+    ]
+    await item_repository.create_many(session, items)
+    return project.id
+
+
+async def cleanup(session, project_id: int) -> None:
+    space_ids = select(Space.id).where(Space.project_id == project_id)
+    await session.execute(delete(Item).where(Item.space_id.in_(space_ids)))
+    await session.execute(delete(Space).where(Space.project_id == project_id))
+    await session.execute(delete(Project).where(Project.id == project_id))
+    await session.commit()
+
+
+def normalized(payload: bytes) -> dict:
+    """Order-insensitive view of a payload; Postgres trims trailing zeros from fractional seconds."""
+    data = json.loads(payload)
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    data["spaces"] = sorted(data["spaces"], key=lambda space: space["id"])
+    for space in data["spaces"]:
+        space["items"] = sorted(space["items"], key=lambda item: item["id"])
+    return data
+
+
+async def orm_read(session, project_id: int) -> bytes:
+    analysis = await project_service.get_project_analysis(session, project_id)
+    return json.dumps(jsonable_encoder(analysis), separators=(",", ":")).encode()
+
+
+async def json_read(session, project_id: int) -> bytes:
+    return await project_service.get_project_analysis_json(session, project_id)
+
+
+async def measure(read, project_id: int, repeat: int):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        # Fresh session each run so the ORM path cannot reuse its identity map
+        async with AsyncSessionLocal() as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            payload = await read(session, project_id)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return payload, statistics.median(timings), peak
+
+
+async def run(sizes, repeat: int) -> None:
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    print(f"{'items':>6} {'kb':>8} {'orm_ms':>8} {'json_ms':>8} {'speedup':>8} {'orm_mb':>7} {'json_mb':>8} same")
+    for size in sizes:
+        async with AsyncSessionLocal() as session:
+            project_id = await seed(session, size)
+        try:
+            orm_payload, orm_s, orm_peak = await measure(orm_read, project_id, repeat)
+            json_payload, json_s, json_peak = await measure(json_read, project_id, repeat)
+            same = normalized(orm_payload) == normalized(json_payload)
+            print(
+                f"{size:>6} {len(json_payload) / 1024:>8.1f} {orm_s * 1000:>8.1f} {json_s * 1000:>8.1f} "
+                f"{orm_s / json_s:>7.1f}x {orm_peak / 1e6:>7.1f} {json_peak / 1e6:>8.1f} {same}"
+            )
+        finally:
+            async with AsyncSessionLocal() as session:
+                await cleanup(session, project_id)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
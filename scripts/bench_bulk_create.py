@@ -0,0 +1,70 @@
+"""
+Benchmark per-row ItemRepository.create against ItemRepository.create_many.
+
+Creates a scratch project and space in the configured DATABASE_URL, inserts N items
+both ways, reports total and per-item cost, then deletes everything it created.
+
+Usage: python scripts/bench_bulk_create.py [--counts 10 30 100 300]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.core.db import AsyncSessionLocal, engine  # noqa: E402
+from app.entities.entities import Item, Project, Space  # noqa: E402
+from app.repositories.project_repository import item_repository, project_repository, space_repository  # noqa: E402
+
+
+def make_items(space_id: int, count: int):
+    return [
+        Item(space_id=space_id, name=f"Bench item {i}", category="Furniture", quantity=i % 5 + 1, confidence=0.9)
+        for i in range(count)
+    ]
+
+
+async def run(counts) -> None:
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    async with AsyncSessionLocal() as session:
+        project = await project_repository.create(session, Project(name="bulk-create benchmark"))
+        space = await space_repository.create(session, Space(project_id=project.id, room_type="Benchmark"))
+        try:
+            print(f"{'items':>6} {'loop_s':>8} {'bulk_s':>8} {'loop_ms/item':>13} {'bulk_ms/item':>13} {'speedup':>8}")
+            for count in counts:
+                started = time.perf_counter()
+                for item in make_items(space.id, count):
+                    await item_repository.create(session, item)
+                loop_s = time.perf_counter() - started
+
+                started = time.perf_counter()
+                await item_repository.create_many(session, make_items(space.id, count))
+                bulk_s = time.perf_counter() - started
+
+                print(
+                    f"{count:>6} {loop_s:>8.3f} {bulk_s:>8.3f} {loop_s / count * 1000:>13.2f} "
+                    f"{bulk_s / count * 1000:>13.2f} {loop_s / bulk_s:>7.1f}x"
+                )
+        finally:
+            await session.execute(delete(Item).where(Item.space_id == space.id))
+            await session.execute(delete(Space).where(Space.id == space.id))
+            await session.execute(delete(Project).where(Project.id == project.id))
+            await session.commit()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 30, 100, 300])
+    args = parser.parse_args()
+    asyncio.run(run(args.counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the streaming DOCX parser against the python-docx object-model parser.
+
+Scales the sample RFP in assignment/ by repeating its body N times (plus a merged-cell
+furniture schedule), checks both parsers produce identical DocumentContent, and reports
+wall time and peak traced memory.
+
+Usage: python scripts/bench_docx_parser.py [--scales 1 10 50 200]
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+import docx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.agents.parser import DocumentContent, DocumentParserAgent  # noqa: E402
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assignment", "Sample_RFP_Medium_ApartmentDesign.docx")
+
+
+def legacy_parse_docx(file_path: str) -> DocumentContent:
+    """The previous implementation: full object model, paragraphs then tables."""
+    doc = docx.Document(file_path)
+    paras = []
+    for para in doc.paragraphs:
+        if para.text.strip():
+            paras.append(para.text)
+    text = "\n".join(paras)
+    tables_md: List[str] = []
+    for tbl in doc.tables:
+        rows = []
+        for row in tbl.rows:
+            cells = [cell.text.strip() for cell in row.cells]
+            rows.append(cells)
+        if rows:
+            header, *body = rows
+            if header:
+                md_header = "| " + " | ".join(header) + " |"
+                md_sep = "| " + " | ".join(["---"] * len(header)) + " |"
+                md_rows = ["| " + " | ".join(r) + " |" for r in body]
+                tables_md.append("\n".join([md_header, md_sep, *md_rows]))
+    return DocumentContent(text=text, metadata={}, tables=tables_md or None)
+
+
+def add_merged_schedule(doc, rows: int = 60) -> None:
+    """Append a furniture schedule with horizontal and vertical merges."""
+    table = doc.add_table(rows=rows, cols=6)
+    table.cell(0, 0).text = "Room"
+    table.cell(0, 1).text = "Item"
+    table.cell(0, 2).merge(table.cell(0, 3)).text = "Specification"
+    table.cell(0, 4).text = "Qty"
+    table.cell(0, 5).text = "Notes"
+    for start in range(1, rows, 10):
+        stop = min(start + 9, rows - 1)
+        table.cell(start, 0).merge(table.cell(stop, 0)).text = f"Room {start}"
+        for r in range(start, stop + 1):
+            table.cell(r, 1).text = f"Item {r}"
+            table.cell(r, 2).merge(table.cell(r, 3)).text = f"Oak, 1200x600, finish {r}"
+            table.cell(r, 4).text = str(r % 7 + 1)
+            table.cell(r, 5).text = "See drawing"
+
+
+def build_scaled_docx(scale: int, directory: str) -> str:
+    doc = docx.Document(SAMPLE)
+    add_merged_schedule(doc)
+    body = doc.element.body
+    blocks = [child for child in body if not child.tag.endswith("sectPr")]
+    sect_pr = body[-1] if body[-1].tag.endswith("sectPr") else None
+    for _ in range(scale - 1):
+        for block in blocks:
+            if sect_pr is not None:
+                sect_pr.addprevious(copy.deepcopy(block))
+            else:
+                body.append(copy.deepcopy(block))
+    path = os.path.join(directory, f"scaled_{scale}.docx")
+    doc.save(path)
+    return path
+
+
+def measure(fn, path: str):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50, 200])
+    args = parser.parse_args()
+
+    streaming = DocumentParserAgent().parse_docx
+    print(f"{'scale':>6} {'size_mb':>8} {'legacy_s':>9} {'stream_s':>9} {'speedup':>8} {'legacy_mb':>10} {'stream_mb':>10} same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = build_scaled_docx(scale, tmp)
+            size_mb = os.path.getsize(path) / 1e6
+            legacy, legacy_s, legacy_peak = measure(legacy_parse_docx, path)
+            stream, stream_s, stream_peak = measure(streaming, path)
+            print(
+                f"{scale:>6} {size_mb:>8.2f} {legacy_s:>9.3f} {stream_s:>9.3f} {legacy_s / stream_s:>7.1f}x "
+                f"{legacy_peak / 1e6:>10.1f} {stream_peak / 1e6:>10.1f} {legacy == stream}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark concurrent uploads and their impact on other endpoints.
+
+Against a running API, sends N concurrent uploads of a random file of the given size while a
+probe loop keeps hitting a cheap endpoint. Reports upload throughput and the probe's
+p50/p99 latency with and without uploads in flight.
+
+Usage: python scripts/bench_upload.py [--api http://localhost:8000/api] [--uploads 16]
+       [--size-mb 20] [--probe-path /metrics/parse-cache]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+    return latencies
+
+
+async def upload(client: httpx.AsyncClient, payload: bytes, index: int) -> int:
+    # Unique bytes per upload so content-addressed storage never short-circuits the write
+    body = payload + index.to_bytes(4, "big")
+    response = await client.post("/projects/upload", files={"file": (f"bench_{index}.pdf", body, "application/pdf")})
+    response.raise_for_status()
+    return len(body)
+
+
+async def measure_probe(client: httpx.AsyncClient, path: str, seconds: float) -> List[float]:
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(client, path, stop))
+    await asyncio.sleep(seconds)
+    stop.set()
+    return await task
+
+
+async def run(api: str, uploads: int, size_mb: float, probe_path: str) -> None:
+    async with httpx.AsyncClient(base_url=api, timeout=300) as client:
+        login = await client.post(
+            "/auth/login", json={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+        )
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+        idle = await measure_probe(client, probe_path, 3.0)
+
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, probe_path, stop))
+        started = time.perf_counter()
+        sizes = await asyncio.gather(*(upload(client, payload, i) for i in range(uploads)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        busy = await probe_task
+
+    total_mb = sum(sizes) / 1024 / 1024
+    print(f"uploads: {uploads} x {size_mb:.1f} MB in {elapsed:.2f}s -> {total_mb / elapsed:.1f} MB/s")
+    for label, values in (("idle", idle), ("during uploads", busy)):
+        if values:
+            print(
+                f"probe {probe_path} {label:>15}: n={len(values):>4} "
+                f"p50={statistics.median(values) * 1000:.1f}ms p99={percentile(values, 99) * 1000:.1f}ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--api", default=settings.API_URL)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--size-mb", type=float, default=20)
+    parser.add_argument("--probe-path", default="/metrics/parse-cache")
+    args = parser.parse_args()
+    asyncio.run(run(args.api, args.uploads, args.size_mb, args.probe_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Check the upload dedup counters behind GET /metrics/dedup through the upload-then-analyze flow.
+
+Drives the API in-process (httpx ASGI transport) against the configured DATABASE_URL:
+uploads random bytes, links the document to a scratch project in place of an LLM analysis,
+re-uploads the same bytes, then analyzes a second row with identical content (as left by a
+concurrent upload) and asserts how uploads_reusing_analysis, analyses_reused and
+llm_runs_avoided move. Deletes everything it created. No LLM calls are made.
+
+Usage: python scripts/check_dedup_metrics.py
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, update  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.db import AsyncSessionLocal  # noqa: E402
+from app.core.storage import content_path  # noqa: E402
+from app.entities.entities import Document, Project  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: str) -> dict:
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.1)
+
+
+async def run() -> int:
+    failures = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    payload = os.urandom(4096)
+    document_ids, project_id, sha256 = [], None, None
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+            login = await client.post(
+                "/api/auth/login", json={"username": settings.ADMIN_USERNAME, "password": settings.ADMIN_PASSWORD}
+            )
+            login.raise_for_status()
+            client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+
+            async def stats() -> dict:
+                return (await client.get("/api/metrics/dedup")).json()
+
+            def delta(before: dict, after: dict, key: str) -> int:
+                return after[key] - before[key]
+
+            try:
+                first = (await client.post("/api/projects/upload", files={"file": ("dedup.pdf", payload)})).json()
+                document_ids.append(first["document_id"])
+                check(not first["duplicate"], "first upload stores a new document")
+
+                # Stand-in for a completed analysis
+                async with AsyncSessionLocal() as session:
+                    project = Project(name="dedup check")
+                    session.add(project)
+                    await session.flush()
+                    project_id = project.id
+                    await session.execute(
+                        update(Document).where(Document.id == first["document_id"]).values(project_id=project_id)
+                    )
+                    document = await session.get(Document, first["document_id"])
+                    sha256 = document.content_sha256
+                    await session.commit()
+
+                before = await stats()
+                again = (await client.post("/api/projects/upload", files={"file": ("dedup-copy.pdf", payload)})).json()
+                after = await stats()
+                check(again["duplicate"] and again["duplicate_of"]["project_id"] == project_id, "re-upload returns the analyzed document")
+                check(delta(before, after, "uploads_reusing_analysis") == 1, "re-upload of analyzed bytes is counted")
+                check(delta(before, after, "llm_runs_avoided") == 1, "re-upload of analyzed bytes counts as an avoided LLM run")
+
+                # A row with identical bytes and no project, as two concurrent uploads can leave behind
+                async with AsyncSessionLocal() as session:
+                    sibling = Document(filename="dedup-race.pdf", content_sha256=sha256, file_path=document.file_path)
+                    session.add(sibling)
+                    await session.commit()
+                    document_ids.append(sibling.id)
+
+                before = await stats()
+                queued = (await client.post(f"/api/documents/{sibling.id}/analyze")).json()
+                job = await wait_for_job(client, queued["job_id"])
+                after = await stats()
+                check(
+                    job["status"] == "succeeded" and [s["stage"] for s in job.get("stages", [])][-1:] == ["reused"],
+                    "analyzing the sibling reuses the existing analysis",
+                )
+                check(delta(before, after, "analyses_reused") == 1, "reused analysis is counted")
+                check(delta(before, after, "llm_runs_avoided") == 1, "reused analysis counts as an avoided LLM run")
+                check(delta(before, after, "analyses_run") == 0, "no analysis pipeline ran")
+            finally:
+                async with AsyncSessionLocal() as session:
+                    if document_ids:
+                        await session.execute(delete(Document).where(Document.id.in_(document_ids)))
+                    if project_id is not None:
+                        await session.execute(delete(Project).where(Project.id == project_id))
+                    await session.commit()
+                if sha256:
+                    try:
+                        os.remove(content_path(sha256, "dedup.pdf"))
+                    except FileNotFoundError:
+                        pass
+
+    print(f"\n{len(failures)} failure(s)" if failures else "\nDedup counters match the upload-then-analyze flow")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
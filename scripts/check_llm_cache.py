@@ -0,0 +1,76 @@
+"""
+Check that corrupt LLM cache entries are treated as misses instead of failing an analysis.
+
+Seeds the memory and disk backends (in a temporary directory) with truncated and malformed
+entries next to a valid one, reads them through LLMResponseCache.get and asserts that each
+corrupt entry returns None, is counted under errors/misses and is evicted. The Postgres
+backend stores the same envelope and goes through the same decode path.
+
+Usage: python scripts/check_llm_cache.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.llm_cache import DiskCacheBackend, LLMResponseCache, MemoryCacheBackend  # noqa: E402
+
+TTL_SECONDS = 3600
+CORRUPT_ENVELOPES = {
+    "truncated": b'{"output": "{\\"spaces\\": [',
+    "not json": b"\x00\x01garbage",
+    "missing output": json.dumps({"latency_seconds": 1.5}).encode("utf-8"),
+    "output not text": json.dumps({"output": 42}).encode("utf-8"),
+}
+
+
+async def check_backend(name: str, backend, failures: list) -> None:
+    def check(condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {name}: {message}")
+        if not condition:
+            failures.append(f"{name}: {message}")
+
+    cache = LLMResponseCache(backend, TTL_SECONDS)
+    await cache.set("extractor", "valid", b'{"spaces": []}', latency_seconds=2.0)
+    check(await cache.get("extractor", "valid") == b'{"spaces": []}', "valid entry is a hit")
+
+    for label, envelope in CORRUPT_ENVELOPES.items():
+        await backend.set(label, "extractor", envelope, TTL_SECONDS)
+        check(await cache.get("extractor", label) is None, f"{label} entry reads as a miss")
+        check(await backend.get(label) is None, f"{label} entry is evicted")
+
+    stats = cache.stats()["agents"]["extractor"]
+    corrupt = len(CORRUPT_ENVELOPES)
+    check(stats["hits"] == 1, "only the valid entry counts as a hit")
+    check(stats["errors"] == corrupt and stats["misses"] == corrupt, "corrupt entries count as errors and misses")
+
+
+async def check_disk_header(directory: str, failures: list) -> None:
+    backend = DiskCacheBackend(directory, 10 * 1024 * 1024)
+    backend.store.set("bad-header", b"not-a-timestamp\n{}")
+    cache = LLMResponseCache(backend, TTL_SECONDS)
+    ok = await cache.get("extractor", "bad-header") is None and backend.store.get("bad-header") is None
+    print(f"{'ok  ' if ok else 'FAIL'} disk: unreadable expiry header reads as a miss and is evicted")
+    if not ok:
+        failures.append("disk: unreadable expiry header")
+
+
+async def run() -> int:
+    failures: list = []
+    await check_backend("memory", MemoryCacheBackend(100, 10 * 1024 * 1024), failures)
+    with tempfile.TemporaryDirectory() as directory:
+        await check_backend("disk", DiskCacheBackend(directory, 10 * 1024 * 1024), failures)
+        await check_disk_header(directory, failures)
+    print(f"\n{len(failures)} failure(s)" if failures else "\nCorrupt LLM cache entries are treated as misses")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Check that re-analysis (ANALYSIS_PERSIST_MODE=reconcile) leaves human work alone.
+
+Persists an extraction for a scratch document in the configured DATABASE_URL, then marks
+review decisions and adds manual rows the way the API does, persists a different extraction
+and asserts what survived: manual spaces keep their dimension/area, reviewed and manual items
+are neither updated nor deleted, unmatched extracted rows are removed. Deletes everything
+it created. No LLM calls are made.
+
+Usage: python scripts/check_reconcile.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, select, update  # noqa: E402
+
+from app.agents.orchestrator import OrchestratorAgent  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.db import AsyncSessionLocal, engine  # noqa: E402
+from app.entities.entities import Document, Item, Project, Space  # noqa: E402
+from app.models.models import ExtractionResult  # noqa: E402
+
+
+def extraction(spaces) -> ExtractionResult:
+    """spaces: [(room_type, dimension, area, [(item name, quantity), ...]), ...]"""
+    return ExtractionResult.model_validate({
+        "project_metadata": {"name": "reconcile check"},
+        "spaces": [
+            {
+                "room_type": room_type,
+                "dimension": dimension,
+                "area": area,
+                "items": [{"name": name, "category": "Furniture", "quantity": qty} for name, qty in items],
+            }
+            for room_type, dimension, area, items in spaces
+        ],
+    })
+
+
+async def snapshot(session, project_id: int):
+    """Spaces keyed by normalized room type, and every item of the project, freshly loaded."""
+    fresh = {"populate_existing": True}
+    spaces = {
+        space.room_type.strip().lower(): space
+        for space in await session.scalars(select(Space).where(Space.project_id == project_id).execution_options(**fresh))
+    }
+    items = list(
+        await session.scalars(select(Item).join(Space).where(Space.project_id == project_id).execution_options(**fresh))
+    )
+    return spaces, items
+
+
+async def run() -> int:
+    settings.ANALYSIS_PERSIST_MODE = "reconcile"
+    failures = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"{'ok  ' if condition else 'FAIL'} {message}")
+        if not condition:
+            failures.append(message)
+
+    async with AsyncSessionLocal() as session:
+        document = Document(filename="reconcile-check.pdf")
+        session.add(document)
+        await session.commit()
+        orchestrator = OrchestratorAgent(session)
+        project_id = None
+        try:
+            project_id = await orchestrator._persist(document, extraction([
+                ("Lobby", "5m x 6m", "30 sqm", [("Sofa", 2), ("Desk", 1)]),
+                ("Office", "4m x 4m", "16 sqm", [("Chair", 4)]),
+                ("Hall", None, None, [("Bench", 1)]),
+            ]))
+            spaces, _ = await snapshot(session, project_id)
+            # Reviewer decisions and manual additions, as the API records them
+            await session.execute(update(Item).where(Item.space_id == spaces["lobby"].id, Item.name == "Sofa").values(is_accepted=True))
+            await session.execute(update(Item).where(Item.space_id == spaces["office"].id).values(is_accepted=False))
+            await session.execute(update(Space).where(Space.id == spaces["hall"].id).values(source="manual", dimension="9m x 9m"))
+            session.add(Item(space_id=spaces["lobby"].id, name="Plant", category="Decor", source="manual"))
+            await session.commit()
+
+            await orchestrator._persist(document, extraction([
+                ("lobby", "5m x 7m", "35 sqm", [("sofa", 3), ("Lamp", 1)]),
+                ("Hall", "2m x 2m", "4 sqm", [("Bench", 1)]),
+                ("Kitchen", None, None, [("Table", 1)]),
+            ]))
+            spaces, item_rows = await snapshot(session, project_id)
+            names = [item.name.lower() for item in item_rows]
+            items = {item.name.lower(): item for item in item_rows}
+
+            check(spaces["lobby"].dimension == "5m x 7m", "extracted space is updated from the new extraction")
+            check(
+                spaces["hall"].dimension == "9m x 9m" and spaces["hall"].area is None and spaces["hall"].version == 1,
+                "manual space keeps its dimension/area and version",
+            )
+            check(items["sofa"].quantity == 2 and items["sofa"].version == 1, "accepted item is not updated")
+            check("chair" in items and "office" in spaces, "rejected item and its space are kept")
+            check("plant" in items, "manual item is kept")
+            check("desk" not in items, "unmatched extracted item is deleted")
+            check(names.count("bench") == 1, "manual space's matched item is not duplicated")
+            check("lamp" in items and "kitchen" in spaces, "new extracted rows are inserted")
+        finally:
+            if project_id is not None:
+                space_ids = select(Space.id).where(Space.project_id == project_id)
+                await session.execute(delete(Item).where(Item.space_id.in_(space_ids)))
+                await session.execute(delete(Space).where(Space.project_id == project_id))
+            await session.execute(delete(Document).where(Document.id == document.id))
+            if project_id is not None:
+                await session.execute(delete(Project).where(Project.id == project_id))
+            await session.commit()
+    await engine.dispose()
+
+    print(f"\n{len(failures)} failure(s)" if failures else "\nReconcile preserved all human work")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    sys.exit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
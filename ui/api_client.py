@@ -0,0 +1,97 @@
+import os
+import time
+from collections import OrderedDict
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+API_URL = os.getenv("API_URL", "http://localhost:8000/api")
+CACHE_MAX_ENTRIES = 32
+
+
+class ApiClient:
+    """
+    Per-browser-session API client.
+
+    One pooled requests.Session keeps connections alive across Streamlit reruns. GET responses
+    carrying an ETag are kept and revalidated with If-None-Match, so an unchanged resource costs
+    a 304 instead of a full download. Responses without an ETag are only cached when the caller
+    passes a ttl. Mutations drop affected entries through their invalidate prefixes.
+    """
+
+    def __init__(self, base_url: str = API_URL):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # path+params -> (response, etag, expires_at)
+        self._cache = OrderedDict()
+
+    def set_token(self, token):
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        else:
+            self.session.headers.pop("Authorization", None)
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def get(self, path: str, params=None, ttl=None) -> requests.Response:
+        """GET with revalidation; a 304 hands back the cached response."""
+        key = (path, tuple(sorted((params or {}).items())))
+        cached = self._cache.get(key)
+        headers = {}
+        if cached:
+            response, etag, expires_at = cached
+            if expires_at is not None and time.monotonic() < expires_at:
+                self._cache.move_to_end(key)
+                return response
+            if etag:
+                headers["If-None-Match"] = etag
+
+        response = self.session.get(self._url(path), params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            self._cache.move_to_end(key)
+            return cached[0]
+
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and (etag or ttl):
+            self._cache[key] = (response, etag, time.monotonic() + ttl if ttl else None)
+            self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.pop(key, None)
+        return response
+
+    def invalidate(self, *prefixes: str) -> None:
+        """Drop cached GETs whose path starts with any of the prefixes."""
+        for key in [key for key in self._cache if key[0].startswith(prefixes)]:
+            del self._cache[key]
+
+    def _send(self, method: str, path: str, invalidate=(), **kwargs) -> requests.Response:
+        response = self.session.request(method, self._url(path), **kwargs)
+        if response.ok and invalidate:
+            self.invalidate(*invalidate)
+        return response
+
+    def post(self, path: str, invalidate=(), **kwargs) -> requests.Response:
+        return self._send("POST", path, invalidate, **kwargs)
+
+    def patch(self, path: str, invalidate=(), **kwargs) -> requests.Response:
+        return self._send("PATCH", path, invalidate, **kwargs)
+
+    def download(self, path: str, params=None) -> requests.Response:
+        """Uncached GET for downloads such as exports."""
+        return self.session.get(self._url(path), params=params)
+
+
+def get_client() -> ApiClient:
+    """The session's client, with the current login token applied."""
+    client = st.session_state.get("api_client")
+    if client is None:
+        client = st.session_state["api_client"] = ApiClient()
+    client.set_token(st.session_state.get("auth_token"))
+    return client
@@ -1,17 +1,13 @@
-import os
+import time
 import streamlit as st
-import requests
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 
-API_URL = os.getenv("API_URL", "http://localhost:8000/api")
+from api_client import get_client
 
-
-def get_headers():
-    token = st.session_state.get("auth_token")
-    if token:
-        return {"Authorization": f"Bearer {token}"}
-    return {}
+PAGE_SIZE = 25
+# Document pages carry no ETag; reuse them briefly and invalidate after uploads/analyses
+DOCUMENTS_TTL_SECONDS = 30
 
 
 def ensure_login():
@@ -23,7 +19,7 @@ def ensure_login():
         password = st.text_input("Password", type="password")
         submitted = st.form_submit_button("Login", type="primary")
     if submitted:
-        resp = requests.post(f"{API_URL}/auth/login", json={"username": username, "password": password})
+        resp = get_client().post("/auth/login", json={"username": username, "password": password})
         if resp.status_code == 200:
             token = resp.json().get("access_token")
             st.session_state["auth_token"] = token
@@ -33,6 +29,21 @@ def ensure_login():
             st.error("Invalid credentials.")
     return False
 
+def wait_for_job(job_id, status_box, poll_seconds=1.0):
+    """Poll an analysis job until it finishes, mirroring its latest stage in the status box."""
+    while True:
+        resp = get_client().get(f"/jobs/{job_id}")
+        if resp.status_code != 200:
+            return {"status": "failed", "error": resp.text}
+        job = resp.json()
+        stages = job.get("stages") or []
+        if stages:
+            latest = stages[-1]
+            status_box.update(label=f"Analyzing... {latest['stage']} ({latest['elapsed_ms'] / 1000:.1f}s)")
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(poll_seconds)
+
 st.set_page_config(page_title="RFP Document Manager", page_icon="Document", layout="wide")
 
 st.title("RFP Document Manager")
@@ -52,6 +63,8 @@ st.markdown(
 if not ensure_login():
     st.stop()
 
+client = get_client()
+
 # Upload Section
 st.header("Upload New Document")
 st.caption("Accepted formats: PDF, DOCX")
@@ -61,11 +74,15 @@ if uploaded_file is not None:
     if st.button("Upload Document", type="primary"):
         with st.spinner("Uploading..."):
             files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-            response = requests.post(f"{API_URL}/projects/upload", files=files, headers=get_headers())
+            response = client.post("/projects/upload", files=files, invalidate=("/documents",))
             
             if response.status_code == 200:
-                st.success("Document uploaded successfully.")
-                st.rerun()
+                result = response.json()
+                if result.get("duplicate"):
+                    st.info(f"Identical document already uploaded as {result['duplicate_of']['filename']}.")
+                else:
+                    st.success("Document uploaded successfully.")
+                    st.rerun()
             else:
                 st.error(f"Upload failed: {response.text}")
 
@@ -74,15 +91,46 @@ st.divider()
 # Documents List Section
 st.header("Uploaded Documents")
 
-# Fetch all documents
+# Filters
+filter_col1, filter_col2, filter_col3 = st.columns([1, 2, 2])
+with filter_col1:
+    status_filter = st.selectbox("Status", ["All", "Analyzed", "Not analyzed"])
+with filter_col2:
+    filename_prefix = st.text_input("Filename starts with")
+with filter_col3:
+    date_range = st.date_input("Uploaded between", value=(), format="YYYY-MM-DD")
+
+params = {"limit": PAGE_SIZE}
+if status_filter != "All":
+    params["analyzed"] = status_filter == "Analyzed"
+if filename_prefix.strip():
+    params["filename_prefix"] = filename_prefix.strip()
+if len(date_range) == 2:
+    params["uploaded_from"] = date_range[0].isoformat()
+    params["uploaded_to"] = (date_range[1] + timedelta(days=1)).isoformat()
+
+# Cursor stack: one entry per page visited; reset whenever the filters change
+filter_key = repr(sorted(params.items()))
+if st.session_state.get("doc_filter_key") != filter_key:
+    st.session_state["doc_filter_key"] = filter_key
+    st.session_state["doc_cursors"] = [None]
+cursors = st.session_state["doc_cursors"]
+if cursors[-1]:
+    params["cursor"] = cursors[-1]
+
+# Fetch one page of documents
 try:
-    response = requests.get(f"{API_URL}/documents", headers=get_headers())
+    response = client.get("/documents", params=params, ttl=DOCUMENTS_TTL_SECONDS)
     if response.status_code == 200:
         data = response.json()
         documents = data.get("documents", [])
+        next_cursor = data.get("next_cursor")
         
         if not documents:
-            st.info("No documents uploaded yet. Upload your first RFP document above!")
+            if len(cursors) > 1 or len(params) > 1:
+                st.info("No documents match these filters.")
+            else:
+                st.info("No documents uploaded yet. Upload your first RFP document above!")
         else:
             # Display documents in a table with action buttons
             for doc in documents:
@@ -103,16 +151,19 @@ try:
                     with col3:
                         # Analyze button
                         if st.button("Analyze", key=f"analyze_{doc['id']}", disabled=False):
-                            with st.spinner("Analyzing..."):
-                                analyze_response = requests.post(
-                                    f"{API_URL}/documents/{doc['id']}/analyze",
-                                    headers=get_headers(),
-                                )
-                                if analyze_response.status_code == 200:
+                            analyze_response = client.post(f"/documents/{doc['id']}/analyze")
+                            if analyze_response.status_code == 202:
+                                job_id = analyze_response.json()["job_id"]
+                                with st.status("Analyzing...") as status_box:
+                                    job = wait_for_job(job_id, status_box)
+                                if job["status"] == "succeeded":
+                                    client.invalidate("/documents", "/projects")
                                     st.success("Analysis complete!")
                                     st.rerun()
                                 else:
-                                    st.error(f"Analysis failed: {analyze_response.text}")
+                                    st.error(f"Analysis failed: {job.get('error')}")
+                            else:
+                                st.error(f"Analysis failed: {analyze_response.text}")
                     
                     with col4:
                         # View button - only enabled if analyzed
@@ -125,6 +176,19 @@ try:
                             st.button("View", key=f"view_{doc['id']}", disabled=True)
                     
                     st.divider()
+
+        # Pagination
+        nav_col1, nav_col2, nav_col3 = st.columns([1, 1, 4])
+        with nav_col1:
+            if st.button("Previous", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with nav_col2:
+            if st.button("Next", disabled=not next_cursor):
+                cursors.append(next_cursor)
+                st.rerun()
+        with nav_col3:
+            st.caption(f"Page {len(cursors)}")
     else:
         st.error("Failed to fetch documents")
 except Exception as e:
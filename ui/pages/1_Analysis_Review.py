@@ -1,15 +1,158 @@
-import os
+import pandas as pd
 import streamlit as st
-import requests
-
-API_URL = os.getenv("API_URL", "http://localhost:8000/api")
 
+from api_client import get_client
+
+GRID_PAGE_SIZES = [50, 100, 200]
+# NOT NULL on the server; the batch endpoint rejects null for them
+GRID_REQUIRED_FIELDS = ["name", "category"]
+GRID_TEXT_FIELDS = [
+    "name",
+    "category",
+    "technical_specs",
+    "material_preference",
+    "color_preference",
+    "brand_preference",
+    "special_instruction",
+]
+STATUS_LABELS = {None: "Pending", True: "Accepted", False: "Rejected"}
+STATUS_VALUES = {label: value for value, label in STATUS_LABELS.items()}
+
+
+def requirement_frame(analysis):
+    """One row per item, indexed by item id."""
+    rows = []
+    for space in analysis.get("spaces") or []:
+        for item in space.get("items") or []:
+            row = {"id": item["id"], "version": item.get("version"), "space": space["room_type"]}
+            row.update({field: item.get(field) or "" for field in GRID_TEXT_FIELDS})
+            row["quantity"] = item.get("quantity")
+            row["confidence"] = item.get("confidence")
+            row["status"] = STATUS_LABELS[item.get("is_accepted")]
+            rows.append(row)
+    return pd.DataFrame(rows).set_index("id")
+
+
+def _cell(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def grid_updates(original, edited):
+    """Batch review payload for the rows whose editable cells changed, plus ids of rows with a cleared required field."""
+    updates = []
+    invalid = []
+    for item_id, before in original.iterrows():
+        after = edited.loc[item_id]
+        update = {
+            field: _cell(after[field])
+            for field in GRID_TEXT_FIELDS + ["quantity"]
+            if _cell(before[field]) != _cell(after[field])
+        }
+        if any(field in update and update[field] is None for field in GRID_REQUIRED_FIELDS):
+            invalid.append(int(item_id))
+            continue
+        if update.get("quantity") is not None:
+            update["quantity"] = int(update["quantity"])
+        if before["status"] != after["status"]:
+            update["is_accepted"] = STATUS_VALUES[after["status"]]
+        if update:
+            update["id"] = int(item_id)
+            update["version"] = int(before["version"])
+            updates.append(update)
+    return updates, invalid
+
+
+def render_grid(project_id, analysis, invalidate):
+    """Paginated grid editor; all edits on the page are saved with one batch PATCH."""
+    frame = requirement_frame(analysis)
+    categories = frame["category"].replace("", "Uncategorized")
+
+    fcol1, fcol2, fcol3, fcol4 = st.columns([2, 2, 1, 1])
+    with fcol1:
+        spaces = st.multiselect("Spaces", sorted(frame["space"].unique()))
+    with fcol2:
+        selected_categories = st.multiselect("Categories", sorted(categories.unique()))
+    with fcol3:
+        statuses = st.multiselect("Status", list(STATUS_VALUES))
+    with fcol4:
+        sort_order = st.selectbox("Sort", ["Space", "Confidence (low first)", "Confidence (high first)"])
+
+    view = frame
+    if spaces:
+        view = view[view["space"].isin(spaces)]
+    if selected_categories:
+        view = view[categories.loc[view.index].isin(selected_categories)]
+    if statuses:
+        view = view[view["status"].isin(statuses)]
+    if sort_order != "Space":
+        view = view.sort_values("confidence", ascending=sort_order.endswith("(low first)"), na_position="first")
+
+    pcol1, pcol2, pcol3 = st.columns([1, 1, 4])
+    with pcol1:
+        page_size = st.selectbox("Rows per page", GRID_PAGE_SIZES)
+    pages = max(1, -(-len(view) // page_size))
+    with pcol2:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1)
+    with pcol3:
+        st.caption(f"{len(view)} of {len(frame)} items, page {page} of {pages}. Unsaved edits are discarded when the page or filters change.")
+    page_rows = view.iloc[(page - 1) * page_size: page * page_size]
+
+    # A new key after each save resets the editor to the refreshed rows
+    generation = st.session_state.setdefault("grid_generation", 0)
+    edited = st.data_editor(
+        page_rows,
+        key=f"grid_{project_id}_{generation}_{page}_{page_size}_{spaces}_{selected_categories}_{statuses}_{sort_order}",
+        hide_index=True,
+        num_rows="fixed",
+        use_container_width=True,
+        column_order=["space", "category", "name", "quantity", "confidence", "status", "technical_specs",
+                      "material_preference", "color_preference", "brand_preference", "special_instruction"],
+        disabled=["space", "confidence"],
+        column_config={
+            "space": st.column_config.TextColumn("Space"),
+            "category": st.column_config.TextColumn("Category", required=True),
+            "name": st.column_config.TextColumn("Item Name", required=True),
+            "quantity": st.column_config.NumberColumn("Qty", min_value=1, step=1),
+            "confidence": st.column_config.ProgressColumn("Confidence", min_value=0.0, max_value=1.0, format="%.2f"),
+            "status": st.column_config.SelectboxColumn("Status", options=list(STATUS_VALUES), required=True),
+            "technical_specs": st.column_config.TextColumn("Technical Specs"),
+            "material_preference": st.column_config.TextColumn("Material"),
+            "color_preference": st.column_config.TextColumn("Color"),
+            "brand_preference": st.column_config.TextColumn("Brand"),
+            "special_instruction": st.column_config.TextColumn("Special Instructions"),
+        },
+    )
+
+    updates, invalid = grid_updates(page_rows, edited)
+    if invalid:
+        names = page_rows["name"].to_dict()
+        st.warning(
+            "Item Name and Category cannot be empty; fix these rows before saving: "
+            + ", ".join(str(names[item_id] or item_id) for item_id in invalid)
+        )
+    if st.button(f"Save {len(updates)} change(s)", type="primary", disabled=not updates or bool(invalid)):
+        resp = get_client().patch(
+            f"/projects/{project_id}/requirements", json={"updates": updates}, invalidate=invalidate
+        )
+        if resp.status_code == 200:
+            result = resp.json()
+            st.session_state["grid_result"] = result
+            st.session_state["grid_generation"] = generation + 1
+            st.rerun()
+        else:
+            st.error(f"Save failed: {resp.text}")
 
-def get_headers():
-    token = st.session_state.get("auth_token")
-    if token:
-        return {"Authorization": f"Bearer {token}"}
-    return {}
+    result = st.session_state.pop("grid_result", None)
+    if result:
+        st.success(f"Saved {len(result['updated'])} item(s).")
+        if result["conflicts"] or result["not_found"]:
+            names = frame["name"].to_dict()
+            skipped = [names.get(c["id"], c["id"]) for c in result["conflicts"]] + [names.get(i, i) for i in result["not_found"]]
+            st.warning(f"Skipped {len(skipped)} item(s) changed or removed by someone else; review them again: {', '.join(map(str, skipped))}")
 
 st.set_page_config(page_title="Analysis & Review", page_icon="Document", layout="wide")
 
@@ -27,12 +170,15 @@ if 'selected_project_id' not in st.session_state:
     st.stop()
 
 project_id = st.session_state['selected_project_id']
+client = get_client()
+# Mutations below drop the cached project reads; the next GET refetches instead of revalidating
+project_paths = (f"/projects/{project_id}",)
 
 st.title("Analysis & Review")
 
 # Fetch project analysis
 try:
-    response = requests.get(f"{API_URL}/projects/{project_id}/analysis", headers=get_headers())
+    response = client.get(f"/projects/{project_id}/analysis")
 
     if response.status_code == 200:
         analysis = response.json()
@@ -59,7 +205,7 @@ try:
         col_export1, col_export2, col_export3 = st.columns([1, 1, 4])
         with col_export1:
             if st.button("Export JSON", use_container_width=True):
-                export_response = requests.get(f"{API_URL}/projects/{project_id}/export?format=json", headers=get_headers())
+                export_response = client.download(f"/projects/{project_id}/export", params={"format": "json"})
                 if export_response.status_code == 200:
                     st.download_button(
                         "Download JSON",
@@ -70,12 +216,11 @@ try:
 
         with col_export2:
             if st.button("Export CSV", use_container_width=True):
-                export_response = requests.get(f"{API_URL}/projects/{project_id}/export?format=csv", headers=get_headers())
+                export_response = client.download(f"/projects/{project_id}/export", params={"format": "csv"})
                 if export_response.status_code == 200:
-                    csv_data = export_response.json().get('csv', '')
                     st.download_button(
                         "Download CSV",
-                        data=csv_data,
+                        data=export_response.text,
                         file_name=f"project_{project_id}_export.csv",
                         mime="text/csv"
                     )
@@ -95,10 +240,10 @@ try:
                 if not prompt_text.strip():
                     st.warning("Please enter a prompt.")
                 else:
-                    resp = requests.post(
-                        f"{API_URL}/projects/{project_id}/prompt-add",
+                    resp = client.post(
+                        f"/projects/{project_id}/prompt-add",
                         json={"prompt": prompt_text},
-                        headers=get_headers(),
+                        invalidate=project_paths,
                     )
                     if resp.status_code == 200:
                         data = resp.json()
@@ -143,14 +288,26 @@ try:
                         "special_instruction": item_instruction or None,
                         "quantity": item_qty or None,
                     }]
-                resp = requests.post(f"{API_URL}/projects/{project_id}/spaces", json=space_payload, headers=get_headers())
+                resp = client.post(f"/projects/{project_id}/spaces", json=space_payload, invalidate=project_paths)
                 if resp.status_code == 200:
                     st.success("Space added.")
                     st.rerun()
                 else:
                     st.error(f"Failed to add space: {resp.text}")
 
-        if "spaces" in analysis and analysis["spaces"]:
+        view_mode = st.radio(
+            "View",
+            ["Grid", "Forms"],
+            horizontal=True,
+            help="Grid edits many items at once; Forms also lets you add items to a space.",
+        )
+
+        if view_mode == "Grid" and analysis.get("spaces"):
+            if any(space.get("items") for space in analysis["spaces"]):
+                render_grid(project_id, analysis, project_paths)
+            else:
+                st.info("No items found for these spaces.")
+        elif "spaces" in analysis and analysis["spaces"]:
             for space_idx, space in enumerate(analysis["spaces"]):
                 with st.expander(f"**{space['room_type']}** - {space.get('dimension', 'N/A')} ({space.get('area', 'N/A')})", expanded=True):
 
@@ -214,10 +371,10 @@ try:
                                                 "quantity": new_qty
                                             }
 
-                                            update_response = requests.patch(
-                                                f"{API_URL}/projects/{project_id}/requirements/{item['id']}",
+                                            update_response = client.patch(
+                                                f"/projects/{project_id}/requirements/{item['id']}",
                                                 json=update_data,
-                                                headers=get_headers(),
+                                                invalidate=project_paths,
                                             )
 
                                             if update_response.status_code == 200:
@@ -228,10 +385,10 @@ try:
 
                                         if accept_clicked or reject_clicked:
                                             patch_body = {"is_accepted": True} if accept_clicked else {"is_accepted": False}
-                                            resp = requests.patch(
-                                                f"{API_URL}/projects/{project_id}/requirements/{item['id']}",
+                                            resp = client.patch(
+                                                f"/projects/{project_id}/requirements/{item['id']}",
                                                 json=patch_body,
-                                                headers=get_headers(),
+                                                invalidate=project_paths,
                                             )
                                             if resp.status_code == 200:
                                                 st.success("Item status updated.")
@@ -268,10 +425,10 @@ try:
                                     "special_instruction": add_instruction or None,
                                     "quantity": add_qty or None,
                                 }
-                                add_resp = requests.post(
-                                    f"{API_URL}/spaces/{space['id']}/items",
+                                add_resp = client.post(
+                                    f"/spaces/{space['id']}/items",
                                     json=payload,
-                                    headers=get_headers(),
+                                    invalidate=project_paths,
                                 )
                                 if add_resp.status_code == 200:
                                     st.success("Item added.")